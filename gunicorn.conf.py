@@ -0,0 +1,12 @@
+# Config de produção do gunicorn (lida automaticamente por `gunicorn tipster:app`)
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+# poucos workers e muitas threads: o trabalho é quase todo I/O na API-Football
+# e os caches em memória são por worker
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+preload_app = True
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+keepalive = 5
@@ -1,13 +1,35 @@
 # tipster.py — UNIFICADO (sports_betting_analyzer + radar_ia + opta_ia + Flask API)
 # Mantive toda a lógica de análise e helpers (cache, heurísticas, odds mapping, análise ao vivo, análise de jogadores).
 import os
+import re
+import sys
+import gzip
+import hashlib
+import heapq
+import math
+import bisect
 import time
-import traceback
+import queue
+import atexit
+import logging
+import threading
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, date, timedelta
-from collections import defaultdict, OrderedDict
-from typing import Dict, Any, List, Optional, Tuple
-from flask import Flask, request, jsonify
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+from functools import lru_cache, wraps
+from itertools import groupby
+from operator import itemgetter
+from types import MappingProxyType
+from dataclasses import dataclass
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from flask import Flask, Response, request, jsonify, g
+from werkzeug.exceptions import HTTPException
+from flask.json.provider import DefaultJSONProvider
 from dotenv import load_dotenv
 
 # Carrega .env se existir
@@ -21,6 +43,23 @@ if not API_SPORTS_KEY:
     # não raise pra permitir debug local, mas loga
     print("WARNING: API_SPORTS_KEY não definida — muitas rotas vão falhar sem a chave.")
 
+# Log de erros via fila: a thread do request só enfileira, a escrita no stderr fica com o listener
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+log = logging.getLogger("tipster")
+log.addHandler(QueueHandler(_log_queue))
+log.setLevel(logging.INFO)
+log.propagate = False
+
+def _start_log_listener():
+    # também roda no filho após o fork (gunicorn --preload): threads não sobrevivem ao fork
+    global _log_listener
+    _log_listener = QueueListener(_log_queue, logging.StreamHandler())
+    _log_listener.start()
+
+_start_log_listener()
+os.register_at_fork(after_in_child=_start_log_listener)
+atexit.register(lambda: _log_listener.stop())
+
 API_URL_BASE = "https://v3.football.api-sports.io"
 HEADERS = {"x-apisports-key": API_SPORTS_KEY} if API_SPORTS_KEY else {}
 
@@ -28,59 +67,173 @@ HEADERS = {"x-apisports-key": API_SPORTS_KEY} if API_SPORTS_KEY else {}
 # CACHE GERAL (usado por módulos)
 # =========================
 CACHE_TTL = int(os.environ.get("CACHE_TTL", "60"))
-_global_cache: Dict[str, Dict[str, Any]] = {}
-
-def _cache_get(key: str):
-    rec = _global_cache.get(key)
-    if not rec:
-        return None
-    if time.time() - rec.get("ts", 0) > CACHE_TTL:
-        _global_cache.pop(key, None)
-        return None
-    return rec.get("data")
+# Estatísticas de jogador (Opta) mudam devagar: TTL bem maior que o geral
+PLAYER_CACHE_TTL = int(os.environ.get("PLAYER_CACHE_TTL", "3600"))
+# Lista consolidada de fixtures (ao vivo + próximos dias)
+FIXTURES_CACHE_TTL = int(os.environ.get("FIXTURES_CACHE_TTL", "120"))
+# Listas de ligas/times do menu Opta (derivadas dos fixtures)
+OPTA_CACHE_TTL = int(os.environ.get("OPTA_CACHE_TTL", "300"))
+# Limite de entradas por cache (LRU): evita crescimento sem fim num bot que roda por dias
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "512"))
+_global_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _cache_get(key: str, max_age: Optional[int] = None):
+    """max_age: frescor exigido por quem lê; entrada mais velha que isso conta como miss (mas fica no cache)."""
+    with _cache_lock:
+        rec = _global_cache.get(key)
+        if not rec:
+            return None
+        age = time.time() - rec.get("ts", 0)
+        if age > rec.get("ttl", CACHE_TTL):
+            _global_cache.pop(key, None)
+            return None
+        if max_age is not None and age > max_age:
+            return None
+        _global_cache.move_to_end(key)
+        return rec.get("data")
 
-def _cache_set(key: str, data):
-    _global_cache[key] = {"ts": time.time(), "data": data}
+def _cache_set(key: str, data, ttl: Optional[int] = None):
+    with _cache_lock:
+        _global_cache[key] = {"ts": time.time(), "ttl": CACHE_TTL if ttl is None else ttl, "data": data}
+        _global_cache.move_to_end(key)
+        while len(_global_cache) > CACHE_MAX_ENTRIES:
+            _global_cache.popitem(last=False)
 
 # =========================
 # HTTP HELPERS (reaproveitados dos módulos)
 # =========================
+# Sessão única com keep-alive: reaproveita conexões TCP/TLS entre chamadas.
+# Retry com backoff só para rate limit / erros transitórios do gateway.
+_SESSION = requests.Session()
+_SESSION.headers.update(HEADERS)
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 502, 503, 504), raise_on_status=False),
+))
+
 def api_get_raw(path: str, params: dict = None, timeout: int = 25) -> Optional[Dict[str, Any]]:
-    """Faz GET para API-Sports e retorna parsed JSON ou None."""
+    """
+    Faz GET para API-Sports e retorna parsed JSON ou None (sem cache; ver cached_api).
+    """
     if not API_SPORTS_KEY:
         print("ERRO: A variável de ambiente API_SPORTS_KEY não está definida.")
         return None
     url = f"{API_URL_BASE}/{path}"
     try:
-        r = requests.get(url, headers=HEADERS, params=params or {}, timeout=timeout)
+        r = _SESSION.get(url, params=params or {}, timeout=timeout)
         r.raise_for_status()
-        return r.json()
+        return orjson.loads(r.content)
     except Exception as e:
         print(f"api_get_raw ERROR {url} params={params}: {e}")
         return None
 
+# TTL por endpoint: ao vivo muda a cada poucos segundos, odds em minutos, a grade do dia quase nada
+LIVE_CACHE_TTL = int(os.environ.get("LIVE_CACHE_TTL", "5"))
+ODDS_CACHE_TTL = int(os.environ.get("ODDS_CACHE_TTL", "60"))
+DAY_FIXTURES_CACHE_TTL = int(os.environ.get("DAY_FIXTURES_CACHE_TTL", "600"))
+
+def _api_ttl(path: str, params: dict) -> int:
+    if path == "fixtures":
+        if "live" in params:
+            return LIVE_CACHE_TTL
+        if "date" in params:
+            return DAY_FIXTURES_CACHE_TTL
+    elif path == "odds":
+        return ODDS_CACHE_TTL
+    return CACHE_TTL
+
+# Chamadas em voo por chave: quem chega com a mesma chave espera o resultado do primeiro
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+def _single_flight(key: str, fn, *args, **kwargs):
+    with _inflight_lock:
+        fut = _inflight.get(key)
+        leader = fut is None
+        if leader:
+            fut = _inflight[key] = Future()
+    if not leader:
+        return fut.result()
+    try:
+        result = fn(*args, **kwargs)
+        fut.set_result(result)
+        return result
+    except BaseException as e:
+        fut.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+class UpstreamError(RuntimeError):
+    """API-Football não respondeu (erro/sem chave): as rotas distinguem isso de um resultado vazio de verdade."""
+
+def cached_api(path: str, params: dict = None, ttl: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """api_get_raw com cache TTL por endpoint (chave = path + params) e coalescência de misses concorrentes."""
+    params = params or {}
+    ck = f"api:{path}:{sorted(params.items())}"
+    ttl = _api_ttl(path, params) if ttl is None else ttl
+    # a mesma chave é lida com TTLs diferentes (analyze usa 60s, o radar ao vivo 5s): o frescor é de quem lê
+    if (cached := _cache_get(ck, max_age=ttl)) is not None:
+        return cached
+
+    def fetch():
+        data = api_get_raw(path, params=params)
+        if data is not None:
+            _cache_set(ck, data, ttl=ttl)
+        return data
+
+    return _single_flight(ck, fetch)
+
 # =========================
 # Pequenos helpers utilitários
 # =========================
+# Sentinela para argumentos opcionais em que None é um valor válido (ex.: resposta vazia da API)
+_UNSET = object()
+
+# Mapeamento vazio compartilhado (somente leitura) para fallbacks `x.get(k) or _EMPTY` sem alocar {} a cada chamada
+_EMPTY = MappingProxyType({})
+
 def safe_int(v):
+    # caminho rápido: o JSON da api-sports já vem numérico quase sempre
+    t = type(v)
+    if t is int:
+        return v
+    if t is float:
+        return int(v) if math.isfinite(v) else 0
     try: return int(v)
     except (ValueError, TypeError):
         try: return int(float(v))
         except Exception: return 0
 
 def safe_float(v, default: float = 0.0):
+    t = type(v)
+    if t is float:
+        return v
     try:
+        if t is int:
+            return float(v)
         return float(str(v).replace(",", "."))
     except Exception:
         return default
 
+@lru_cache(maxsize=256)
+def _conf_pct_text(c: float) -> str:
+    # confianças se repetem muito (0.30, 0.65, 0.75...): o texto sai do cache
+    try:
+        return f"{int(round(c * 100))}%"
+    except (ValueError, OverflowError):
+        return "0%"
+
 def format_conf_pct(confidence: Optional[float]) -> str:
     """Formata confiança float (0..1) para percent string (ex.: 0.45 -> '45%')."""
     try:
         c = float(confidence or 0.0)
-        return f"{c*100:.0f}%"
     except Exception:
         return "0%"
+    return _conf_pct_text(c)
 
 # =========================
 # SPORTS BETTING ANALYZER (pré-live)
@@ -88,232 +241,286 @@ def format_conf_pct(confidence: Optional[float]) -> str:
 
 PREFERRED_BOOKMAKERS = ["bet365", "betano", "superbet", "pinnacle"]
 
-def normalize_game(raw: dict) -> dict:
-    fixture = raw.get("fixture", {}) or {}
-    league = raw.get("league", {}) or {}
-    teams = raw.get("teams", {}) or {}
-    status = fixture.get("status", {}) or {}
-    return {
-        "game_id": fixture.get("id"),
-        "date": fixture.get("date"),
-        "league": league,
-        "teams": teams,
-        "status": status,
-        "type": ("live" if status.get("elapsed") else "scheduled"),
-        "raw": raw
-    }
+@dataclass(slots=True)
+class Game:
+    """Fixture normalizado; league/teams/status não são duplicados: as propriedades leem direto de raw."""
+    game_id: Optional[int]
+    date: Optional[str]
+    type: str
+    raw: dict
+
+    @property
+    def league(self) -> Dict[str, Any]:
+        return self.raw.get("league") or _EMPTY
+
+    @property
+    def teams(self) -> Dict[str, Any]:
+        return self.raw.get("teams") or _EMPTY
+
+    @property
+    def status(self) -> Dict[str, Any]:
+        return (self.raw.get("fixture") or _EMPTY).get("status") or _EMPTY
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"game_id": self.game_id, "date": self.date, "type": self.type, "raw": self.raw}
+
+def normalize_game(raw: dict) -> Game:
+    fixture = raw.get("fixture") or _EMPTY
+    status = fixture.get("status") or _EMPTY
+    return Game(
+        game_id=fixture.get("id"),
+        date=fixture.get("date"),
+        type=("live" if status.get("elapsed") else "scheduled"),
+        raw=raw,
+    )
 
-def get_fixtures_for_dates(days_forward: int = 0) -> List[dict]:
+def get_fixtures_for_dates(days_forward: int = 0) -> List[Game]:
     """
     Retorna fixtures cobrindo hoje + days_forward dias e jogos ao vivo.
     Mantém cache para economizar chamadas.
     """
-    ck = f"all_fixtures_v4_{days_forward}"
+    today = datetime.utcnow().date()
+    # a data UTC na chave faz o cache virar sozinho à meia-noite
+    ck = f"fixtures:dates:{days_forward}:{today}"
     cached = _cache_get(ck)
-    if cached:
+    if cached is not None:
         return cached
-
-    dates = [(datetime.utcnow().date() + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days_forward + 1)]
-    all_fixtures: List[dict] = []
-    seen_ids = set()
-
-    # primeiro adiciona live
-    live_data = api_get_raw("fixtures", params={"live": "all"})
-    if live_data and live_data.get("response"):
-        for fixture in live_data["response"]:
-            fid = fixture.get("fixture", {}).get("id")
-            if fid and fid not in seen_ids:
-                all_fixtures.append(normalize_game(fixture))
-                seen_ids.add(fid)
-
-    # depois datas
-    for d in dates:
-        fixtures_data = api_get_raw("fixtures", params={"date": d})
-        if fixtures_data and fixtures_data.get("response"):
-            for fixture in fixtures_data["response"]:
-                fid = fixture.get("fixture", {}).get("id")
-                if fid and fid not in seen_ids:
-                    all_fixtures.append(normalize_game(fixture))
-                    seen_ids.add(fid)
-    _cache_set(ck, all_fixtures)
+    # N requests chegando juntos no miss fazem uma única busca; os demais esperam o resultado dela
+    return _single_flight(ck, _fetch_fixtures_for_dates, ck, today, days_forward)
+
+def _fetch_fixtures_for_dates(ck: str, today: date, days_forward: int) -> List[Game]:
+    dates = [(today + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days_forward + 1)]
+    # live + uma chamada por data, todas em paralelo (I/O-bound); o merge segue a ordem de submissão
+    params_list = [{"live": "all"}] + [{"date": d} for d in dates]
+    with ThreadPoolExecutor(max_workers=len(params_list)) as ex:
+        futures = [ex.submit(cached_api, "fixtures", params=p) for p in params_list]
+
+    # dict mantém a ordem de inserção (ao vivo primeiro, depois datas) e já serve de dedup por id:
+    # junta os raws primeiro e normaliza uma vez só por jogo
+    uniq: Dict[int, dict] = {}
+    for params, fut in zip(params_list, futures):
+        data = fut.result()
+        if data is None:
+            # janela incompleta não vira lista vazia/parcial cacheada: quem chamou decide (stale, 503...)
+            raise UpstreamError(f"fixtures {params} sem resposta da API")
+        for fixture in data.get("response") or ():
+            if fid := (fixture.get("fixture") or _EMPTY).get("id"):
+                uniq.setdefault(fid, fixture)
+    all_fixtures = list(map(normalize_game, uniq.values()))
+    _cache_set(ck, all_fixtures, ttl=FIXTURES_CACHE_TTL)
+    _index_fixtures(uniq)
     return all_fixtures
 
+# Índice fid -> fixture raw da última busca de fixtures, com o mesmo TTL da lista
+# (fica fora do LRU geral para não expulsar outras entradas com centenas de jogos)
+_fixture_index: Dict[int, Tuple[float, dict]] = {}  # fid -> (ts da busca, fixture raw)
+
+def _index_fixtures(raws: Dict[int, dict]) -> None:
+    # cada entrada tem o próprio ts: as janelas (days=0, days=2) renovam fora de sincronia e uma
+    # não pode manter viva a entrada da outra; o que passou do TTL sai a cada escrita
+    now = time.time()
+    with _cache_lock:
+        expired = [fid for fid, (ts, _) in _fixture_index.items() if now - ts >= FIXTURES_CACHE_TTL]
+        for fid in expired:
+            del _fixture_index[fid]
+        for fid, raw in raws.items():
+            _fixture_index[fid] = (now, raw)
+
+def _indexed_fixture(fid: int) -> Optional[dict]:
+    with _cache_lock:
+        entry = _fixture_index.get(fid)
+    if entry is None or time.time() - entry[0] >= FIXTURES_CACHE_TTL:
+        return None
+    return entry[1]
+
 def fetch_football_statistics(fixture_id: int) -> Optional[Dict[str, Any]]:
-    return api_get_raw("fixtures/statistics", params={"fixture": fixture_id})
+    return cached_api("fixtures/statistics", params={"fixture": fixture_id})
+
+def fetch_football_statistics_many(fixture_ids: List[int]) -> Dict[int, Optional[Dict[str, Any]]]:
+    """Busca fixtures/statistics de vários jogos em paralelo (chamadas I/O-bound, até 8 simultâneas)."""
+    if not fixture_ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(8, len(fixture_ids))) as ex:
+        return dict(zip(fixture_ids, ex.map(fetch_football_statistics, fixture_ids)))
+
+# chaves de fixtures/statistics consultadas pela heurística pré-jogo (em ordem de preferência)
+PRE_SHOTS_ON_KEYS = ("Shots on Goal", "Total shots")
+PRE_FORM_KEYS = ("Form",)
+
+# só estas chegam ao stats_map: o resto do bloco de statistics não é lido por ninguém
+_PRE_STAT_KEYS = frozenset(PRE_SHOTS_ON_KEYS + PRE_FORM_KEYS)
 
 def build_stats_map(stats_raw: Optional[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
-    out: Dict[int, Dict[str, Any]] = {}
     if not stats_raw or "response" not in stats_raw:
-        return out
-    for item in stats_raw["response"]:
-        tid = item.get("team", {}).get("id")
-        if not tid:
-            continue
-        out[tid] = {}
-        for s in item.get("statistics", []) or []:
-            k = (s.get("type") or "").strip()
-            v = s.get("value")
-            out[tid][k] = safe_int(v)
-    return out
+        return {}
+    return {
+        tid: {
+            k: safe_int(s.get("value"))
+            for s in (item.get("statistics") or [])
+            if (k := (s.get("type") or "").strip()) in _PRE_STAT_KEYS
+        }
+        for item in stats_raw["response"]
+        if (tid := item.get("team", {}).get("id"))
+    }
+
+def _first_truthy(d: Dict[str, Any], keys: Tuple[str, ...]):
+    for k in keys:
+        if val := d.get(k): return val
+    return 0
+
+# (predicado, mercado, recomendação, confiança, template do motivo) — predicados de um mesmo
+# mercado são mutuamente exclusivos (equivalem aos if/elif/else originais)
+_PRE_GAME_RULES = (
+    (lambda c: c["power_diff"] > 5, "Resultado Final", "Vitória Casa", 0.75, "Casa com maior poder de fogo ({power_diff:.1f})"),
+    (lambda c: c["power_diff"] > 5, "Handicap Asiático", "Casa -0.5", 0.65, "Casa é favorita para vencer"),
+    (lambda c: c["power_diff"] < -5, "Resultado Final", "Vitória Visitante", 0.75, "Visitante com maior poder de fogo ({power_diff:.1f})"),
+    (lambda c: c["power_diff"] < -5, "Handicap Asiático", "Visitante -0.5", 0.65, "Visitante é favorito para vencer"),
+    (lambda c: -5 <= c["power_diff"] <= 5, "Dupla Chance", "Casa ou Empate", 0.50, "Jogo equilibrado, casa tem pequena vantagem"),
+    (lambda c: c["total_shots"] > 10, "Total de Gols", "Mais de 1.5", 0.65, "{total_shots} remates esperados no total"),
+    (lambda c: c["total_shots"] < 5, "Total de Gols", "Menos de 2.5", 0.60, "Equipes com baixa média de remates"),
+    (lambda c: c["h_sot"] > 4 and c["a_sot"] > 4, "Ambas Marcam", "Sim", 0.70, "Ambas as equipes criam chances ({h_sot} vs {a_sot} remates)"),
+)
+
+# completam a lista quando sobram menos de 3 previsões (só mercados ainda ausentes)
+_PRE_GAME_FALLBACKS = (
+    {"market": "Total de Gols", "recommendation": "Mais de 1.5", "confidence": 0.45, "reason": "Sugestão conservadora"},
+    {"market": "Ambas Marcam", "recommendation": "Sim", "confidence": 0.40, "reason": "Sugestão conservadora"},
+    {"market": "Resultado Final", "recommendation": "Sem favorito definido", "confidence": 0.30, "reason": "Dados limitados"},
+)
+
+def _power_kernel(h_sot: float, a_sot: float, h_wins: int, a_wins: int) -> Tuple[float, float, float]:
+    """Poder de fogo de cada lado (remates no alvo x1.5 + vitórias recentes x2) e a diferença casa - fora."""
+    h_power = h_sot * 1.5 + h_wins * 2
+    a_power = a_sot * 1.5 + a_wins * 2
+    return h_power, a_power, h_power - a_power
 
 def heuristics_football(fixture_raw: dict, stats_map: Dict[int, Dict[str, Any]]) -> Tuple[List[dict], dict]:
     teams = fixture_raw.get("teams", {})
     home, away = teams.get("home", {}), teams.get("away", {})
-    home_stats, away_stats = stats_map.get(home.get("id"), {}), stats_map.get(away.get("id"), {})
-    
-    def g(d, k_list):
-        for k in k_list:
-            if val := d.get(k): return val
-        return 0
+    home_stats, away_stats = stats_map.get(home.get("id"), _EMPTY), stats_map.get(away.get("id"), _EMPTY)
 
-    h_sot = g(home_stats, ["Shots on Goal", "Total shots"])
-    a_sot = g(away_stats, ["Shots on Goal", "Total shots"])
-    h_form = g(home_stats, ["Form"])
-    a_form = g(away_stats, ["Form"])
+    h_sot = _first_truthy(home_stats, PRE_SHOTS_ON_KEYS)
+    a_sot = _first_truthy(away_stats, PRE_SHOTS_ON_KEYS)
+    h_form = _first_truthy(home_stats, PRE_FORM_KEYS)
+    a_form = _first_truthy(away_stats, PRE_FORM_KEYS)
     
-    h_power = h_sot * 1.5 + (h_form.count('W') * 2 if isinstance(h_form, str) else 0)
-    a_power = a_sot * 1.5 + (a_form.count('W') * 2 if isinstance(a_form, str) else 0)
-    power_diff = h_power - a_power
+    h_wins = h_form.count('W') if isinstance(h_form, str) else 0
+    a_wins = a_form.count('W') if isinstance(a_form, str) else 0
+    h_power, a_power, power_diff = _power_kernel(h_sot, a_sot, h_wins, a_wins)
     total_shots = h_sot + a_sot
     
-    preds: List[dict] = []
-    def add(market, rec, conf, reason): preds.append({"market": market, "recommendation": rec, "confidence": conf, "reason": reason})
-
-    if power_diff > 5:
-        add("Resultado Final", "Vitória Casa", 0.75, f"Casa com maior poder de fogo ({power_diff:.1f})")
-        add("Handicap Asiático", "Casa -0.5", 0.65, "Casa é favorita para vencer")
-    elif power_diff < -5:
-        add("Resultado Final", "Vitória Visitante", 0.75, f"Visitante com maior poder de fogo ({power_diff:.1f})")
-        add("Handicap Asiático", "Visitante -0.5", 0.65, "Visitante é favorito para vencer")
-    else:
-        add("Dupla Chance", "Casa ou Empate", 0.50, "Jogo equilibrado, casa tem pequena vantagem")
-
-    if total_shots > 10:
-        add("Total de Gols", "Mais de 1.5", 0.65, f"{total_shots} remates esperados no total")
-    elif total_shots < 5:
-        add("Total de Gols", "Menos de 2.5", 0.60, "Equipes com baixa média de remates")
-
-    if h_sot > 4 and a_sot > 4:
-        add("Ambas Marcam", "Sim", 0.70, f"Ambas as equipes criam chances ({h_sot} vs {a_sot} remates)")
+    ctx = {"power_diff": power_diff, "total_shots": total_shots, "h_sot": h_sot, "a_sot": a_sot}
+    # uma passada pela tabela; o motivo só é formatado quando a regra dispara
+    preds: List[dict] = [
+        {"market": market, "recommendation": rec, "confidence": conf, "reason": reason.format_map(ctx)}
+        for pred_fn, market, rec, conf, reason in _PRE_GAME_RULES if pred_fn(ctx)
+    ]
 
     preds.sort(key=lambda x: x['confidence'], reverse=True)
     summary = {"home_power": round(h_power, 2), "away_power": round(a_power, 2)}
     
     if len(preds) < 3:
-        if not any(p['market'] == 'Total de Gols' for p in preds): add("Total de Gols", "Mais de 1.5", 0.45, "Sugestão conservadora")
-        if not any(p['market'] == 'Ambas Marcam' for p in preds): add("Ambas Marcam", "Sim", 0.40, "Sugestão conservadora")
-        if not any(p['market'] == 'Resultado Final' for p in preds): add("Resultado Final", "Sem favorito definido", 0.30, "Dados limitados")
+        present = {p['market'] for p in preds}
+        preds.extend(dict(p) for p in _PRE_GAME_FALLBACKS if p['market'] not in present)
     
     return preds[:3], summary
 
-def enhance_predictions_with_odds(predictions: List[Dict], fixture_id: int) -> List[Dict]:
+# MAPA DE TRADUÇÃO CORRIGIDO (mercado interno -> nome do mercado na API)
+_MARKET_TRANSLATIONS = {
+    "Resultado Final": "Match Winner",
+    "Dupla Chance": "Double Chance",
+    "Ambas Marcam": "Both Teams Score",
+    "Total de Gols": "Goals Over/Under",
+    "Escanteios Asiáticos": "Asian Corners",
+    "Handicap Asiático": "Asian Handicap"
+}
+_RELEVANT_API_MARKETS = frozenset(_MARKET_TRANSLATIONS.values())
+_HANDICAP_RE = re.compile(r"^(Casa|Visitante)\s+(\S+)")
+
+def _iter_odds_candidates(bookmakers: List[dict]):
+    for bookmaker_data in bookmakers:
+        bookmaker_name = bookmaker_data.get("bookmaker", {}).get("name", "").lower()
+        book = bookmaker_name.capitalize()
+        is_preferred = 1 if bookmaker_name in PREFERRED_BOOKMAKERS else 0
+        for market in bookmaker_data.get("bets", []):
+            market_name = market.get("name", "")
+            # só interessam os mercados que as nossas previsões conseguem traduzir
+            if market_name not in _RELEVANT_API_MARKETS:
+                continue
+            for value in market.get("values", []):
+                yield (market_name, value.get('value')), safe_float(value.get('odd')), book, is_preferred
+
+def _odds_sort_key(candidate: tuple):
+    # agrupa chaves iguais lado a lado sem comparar tipos diferentes (o 'value' pode vir None/num/str)
+    market_name, value = candidate[0]
+    return market_name, type(value).__name__, str(value)
+
+def fetch_odds(fixture_id: int) -> Optional[Dict[str, Any]]:
+    return cached_api("odds", params={"fixture": str(fixture_id)})
+
+def enhance_predictions_with_odds(predictions: List[Dict], fixture_id: int, odds_raw: Any = _UNSET) -> List[Dict]:
     for pred in predictions:
         pred.setdefault("best_odd", None)
         pred.setdefault("best_book", None)
 
-    odds_raw = api_get_raw("odds", params={"fixture": str(fixture_id)})
+    if odds_raw is _UNSET:
+        odds_raw = fetch_odds(fixture_id)
     if not odds_raw or not odds_raw.get("response"):
         return predictions
 
-    best_odds_map = {}
     try:
-        for bookmaker_data in odds_raw["response"]:
-            bookmaker_name = bookmaker_data.get("bookmaker", {}).get("name", "").lower()
-            for market in bookmaker_data.get("bets", []):
-                market_name = market.get("name", "")
-                for value in market.get("values", []):
-                    key = f"{market_name}:{value.get('value')}"
-                    odd = safe_float(value.get('odd'))
-                    is_preferred = 1 if bookmaker_name in PREFERRED_BOOKMAKERS else 0
-                    if key not in best_odds_map or odd > best_odds_map[key]['odd'] or (odd == best_odds_map[key]['odd'] and is_preferred > best_odds_map[key]['is_preferred']):
-                        best_odds_map[key] = {'odd': odd, 'bookmaker': bookmaker_name.capitalize(), 'is_preferred': is_preferred}
+        # (chave, odd, casa, preferida) achatado; por chave vence a maior odd e, no empate, a casa preferida
+        candidates = sorted(_iter_odds_candidates(odds_raw["response"]), key=_odds_sort_key)
+        best_odds_map: Dict[Tuple[str, Any], dict] = {}
+        for key, group in groupby(candidates, key=itemgetter(0)):
+            _, odd, book, pref = max(group, key=itemgetter(1, 3))
+            best_odds_map[key] = {'odd': odd, 'bookmaker': book, 'is_preferred': pref}
     except Exception as e:
         print(f"Erro ao processar odds para fixture {fixture_id}: {e}")
         return predictions
 
-    # MAPA DE TRADUÇÃO CORRIGIDO
-    market_translations = {
-        "Resultado Final": "Match Winner",
-        "Dupla Chance": "Double Chance",
-        "Ambas Marcam": "Both Teams Score",
-        "Total de Gols": "Goals Over/Under",
-        "Escanteios Asiáticos": "Asian Corners",
-        "Handicap Asiático": "Asian Handicap"
-    }
-
     for pred in predictions:
         internal_market = pred['market']
         recommendation = pred['recommendation']
         
         # Traduz nosso nome de mercado para o nome da API
-        api_market_name = market_translations.get(internal_market)
+        api_market_name = _MARKET_TRANSLATIONS.get(internal_market)
         if not api_market_name:
             continue # Pula se não tivermos uma tradução para este mercado
 
-        # Monta a chave de busca final
-        # Ex: "Goals Over/Under" + ":" + "Over 1.5" -> "Goals Over/Under:Over 1.5"
-        # Ex: "Match Winner" + ":" + "Home" -> "Match Winner:Home"
-        api_key = f"{api_market_name}:{recommendation}"
+        # Chave de busca: (mercado da API, valor)
+        # Ex: ("Goals Over/Under", "Over 1.5"), ("Match Winner", "Home")
+        api_key = (api_market_name, recommendation)
 
-        # Lógica especial para Handicap, que tem 'Casa' ou 'Visitante' no meio
-        if internal_market == "Handicap Asiático":
-            parts = recommendation.split(" ")
-            team_rec = parts[0] # Casa ou Visitante
-            handicap_value = parts[1] # -0.5, +1.5 etc
-            api_key = f"{api_market_name}:{team_rec} {handicap_value}"
+        # Lógica especial para Handicap: "<Casa|Visitante> <linha>" (ex.: "Casa -0.5")
+        if internal_market == "Handicap Asiático" and (m := _HANDICAP_RE.match(recommendation)):
+            api_key = (api_market_name, f"{m[1]} {m[2]}")
 
         if found_odd := best_odds_map.get(api_key):
             pred['best_odd'] = found_odd['odd']
             pred['best_book'] = found_odd['bookmaker']
             
     return predictions
-    
-    market_map = {
-        "Resultado Final:Vitória Casa": "Match Winner:Home", "Resultado Final:Vitória Visitante": "Match Winner:Away", "Resultado Final:Empate": "Match Winner:Draw",
-        "Dupla Chance:Casa ou Empate": "Double Chance:Home/Draw", "Dupla Chance:Fora ou Empate": "Double Chance:Away/Draw",
-        "Ambas Marcam:Sim": "Both Teams to Score:Yes", "Ambas Marcam:Não": "Both Teams to Score:No",
-        "Total de Gols:Mais de": "Over/Under:Over", "Total de Gols:Menos de": "Over/Under:Under",
-        "Escanteios Asiáticos:Mais de": "Asian Corners:Over", "Escanteios Asiáticos:Menos de": "Asian Corners:Under",
-        "Handicap Asiático:Casa": "Asian Handicap:Home", "Handicap Asiático:Visitante": "Asian Handicap:Away"
-    }
 
-    for pred in predictions:
-        rec = pred['recommendation']
-        market_base = pred['market']
-        found_odd = None
-        
-        if any(keyword in rec for keyword in ["Mais de", "Menos de", "-0.5", "+0.5"]):
-            parts = rec.split(" ")
-            value = parts[-1]
-            key_part_base = parts[0] if market_base == "Handicap Asiático" else " ".join(parts[:-1])
-            key_part = f"{market_base}:{key_part_base}"
-            if api_market_base := market_map.get(key_part):
-                found_odd = best_odds_map.get(f"{api_market_base} {value}")
-        else:
-            key = f"{market_base}:{rec}"
-            if api_key := market_map.get(key):
-                found_odd = best_odds_map.get(api_key)
-        
-        if found_odd:
-            pred['best_odd'] = found_odd['odd']
-            pred['best_book'] = found_odd['bookmaker']
-            
-    return predictions
-
-def analyze(game_id: int):
+def analyze(game_id: int, stats_raw: Any = _UNSET, odds_raw: Any = _UNSET):
     """
     Análise pré-live principal. Sempre retorna um objeto com 'top3' com ao menos 3 sugestões.
+    stats_raw/odds_raw podem vir pré-buscados (analyze_many); se omitidos, busca aqui.
     """
-    fixture_data = api_get_raw("fixtures", params={"id": game_id})
-    if not fixture_data or not fixture_data.get("response"):
-        return None
-    fixture = fixture_data["response"][0]
-    stats_raw = fetch_football_statistics(game_id)
+    # reaproveita o fixture da última listagem (get_fixtures_for_dates); só vai na API se não estiver lá
+    fixture = _indexed_fixture(game_id)
+    if fixture is None:
+        fixture_data = cached_api("fixtures", params={"id": game_id})
+        if not fixture_data or not fixture_data.get("response"):
+            return None
+        fixture = fixture_data["response"][0]
+    if stats_raw is _UNSET:
+        stats_raw = fetch_football_statistics(game_id)
     stats_map = build_stats_map(stats_raw)
     preds, summary = heuristics_football(fixture, stats_map)
     
     # Chama a nova função de odds
-    enhanced = enhance_predictions_with_odds(preds, game_id)
+    enhanced = enhance_predictions_with_odds(preds, game_id, odds_raw=odds_raw)
     
     # ensure top3 exists
     top3 = enhanced[:3]
@@ -332,6 +539,21 @@ def analyze(game_id: int):
 def analyze_game(game_id: int):
     return analyze(game_id)
 
+def analyze_many(game_ids: List[int]) -> Dict[int, Optional[dict]]:
+    """
+    Analisa vários jogos: statistics e odds de todos são buscados em paralelo (I/O-bound)
+    e o resto do pipeline roda em sequência com os dados já em mãos.
+    """
+    if not game_ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(16, 2 * len(game_ids))) as ex:
+        stats_futs = {gid: ex.submit(fetch_football_statistics, gid) for gid in game_ids}
+        odds_futs = {gid: ex.submit(fetch_odds, gid) for gid in game_ids}
+    return {
+        gid: analyze(gid, stats_raw=stats_futs[gid].result(), odds_raw=odds_futs[gid].result())
+        for gid in game_ids
+    }
+
 # =========================
 # análise a partir de dados ao vivo (RadarIA)
 # =========================
@@ -506,21 +728,27 @@ def analyze_live_from_stats(radar_data: Dict) -> List[Dict]:
 # RADAR IA (ao vivo) — funções consolidadas
 # =========================
 RADAR_CACHE_TTL = int(os.environ.get("RADAR_CACHE_TTL", "8"))
-_radar_cache: Dict[str, Dict[str, Any]] = {}
+_radar_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
 
 API_CFG = {"football": {"base": API_URL_BASE, "host": "v3.football.api-sports.io"}}
 
 def _radar_cache_get(key):
-    rec = _radar_cache.get(key)
-    if not rec:
-        return None
-    if time.time() - rec.get("ts", 0) > RADAR_CACHE_TTL:
-        _radar_cache.pop(key, None)
-        return None
-    return rec["data"]
+    with _cache_lock:
+        rec = _radar_cache.get(key)
+        if not rec:
+            return None
+        if time.time() - rec.get("ts", 0) > RADAR_CACHE_TTL:
+            _radar_cache.pop(key, None)
+            return None
+        _radar_cache.move_to_end(key)
+        return rec["data"]
 
 def _radar_cache_set(key, data):
-    _radar_cache[key] = {"ts": time.time(), "data": data}
+    with _cache_lock:
+        _radar_cache[key] = {"ts": time.time(), "data": data}
+        _radar_cache.move_to_end(key)
+        while len(_radar_cache) > CACHE_MAX_ENTRIES:
+            _radar_cache.popitem(last=False)
 
 def headers_for():
     cfg = API_CFG["football"]
@@ -531,9 +759,9 @@ def safe_get(url, headers, params=None, timeout=20):
         print("ERRO: A variável de ambiente API_SPORTS_KEY não está definida.")
         return None
     try:
-        r = requests.get(url, headers=headers, params=params or {}, timeout=timeout)
+        r = _SESSION.get(url, headers=headers, params=params or {}, timeout=timeout)
         r.raise_for_status()
-        return r.json()
+        return orjson.loads(r.content)
     except Exception as e:
         print(f"safe_get error para {url} com params {params}: {e}")
         return None
@@ -544,7 +772,7 @@ def _compute_sort_key(ev):
     return elapsed + extra
 
 def _format_display_time(ev):
-    t = ev.get("time", {}) or {}
+    t = ev.get("time") or _EMPTY
     elapsed = t.get("elapsed")
     extra = t.get("extra")
     if elapsed is None:
@@ -553,31 +781,90 @@ def _format_display_time(ev):
         return f"{elapsed}+{extra}'"
     return f"{elapsed}'"
 
+# (substring no detail, categoria) — a primeira que bater vence
+_EVENT_KEYWORDS = (
+    ("goal", "Gol"),
+    ("yellow card", "Cartão Amarelo"),
+    ("red card", "Cartão Vermelho"),
+    ("substitution", "Substituição"),
+    ("corner", "Escanteio"),
+)
+
+@lru_cache(maxsize=256)
+def _classify_detail(detail: str, fallback: Any) -> Any:
+    # os details se repetem muito ("Normal Goal", "Yellow Card", "Substitution 1"...): cache por string
+    detail = detail.lower()
+    for keyword, category in _EVENT_KEYWORDS:
+        if keyword in detail:
+            return category
+    return fallback
+
 def classify_event(ev):
-    detail = (ev.get("detail") or "").lower()
-    if "goal" in detail: return "Gol"
-    if "yellow card" in detail: return "Cartão Amarelo"
-    if "red card" in detail: return "Cartão Vermelho"
-    if "substitution" in detail: return "Substituição"
-    if "corner" in detail: return "Escanteio"
-    return ev.get("type", "Evento")
+    return _classify_detail(ev.get("detail") or "", ev.get("type", "Evento"))
 
 def try_int(v):
-    try:
-        if isinstance(v, str) and "%" in v:
-            return int(v.replace("%", "").strip())
-        return int(v)
-    except (ValueError, TypeError, AttributeError):
+    # Sem exceções no caminho comum: a API devolve muito None / "55%" / valores já numéricos
+    if v is None:
         return 0
+    if isinstance(v, int):
+        return int(v)
+    if isinstance(v, float):
+        return int(v) if v == v else 0
+    if isinstance(v, str):
+        s = v.strip()
+        if s.endswith("%"):
+            s = s[:-1].strip()
+        digits = s[1:] if s[:1] in ("-", "+") else s
+        if digits.isdecimal():
+            return int(s)
+    return 0
+
+# Aliases das estatísticas já normalizadas (minúsculas_com_underscore) em stats_aovivo
+SHOTS_TOTAL_KEYS = ("total_shots", "shots_total")
+SHOTS_ON_KEYS = ("shots_on_goal", "shots_on_target")
+CORNERS_KEYS = ("corner_kicks", "corners")
+YELLOWS_KEYS = ("yellow_cards",)
+REDS_KEYS = ("red_cards",)
+POSSESSION_KEYS = ("ball_possession", "possession")
+FOULS_KEYS = ("fouls",)
+OFFSIDES_KEYS = ("offsides",)
+
+def _first(side_stats: Dict[str, Any], keys: Tuple[str, ...]):
+    for k in keys:
+        if k in side_stats: return side_stats.get(k, 0)
+    return 0
+
+def _canon_side(side_stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Resolve os aliases de um lado uma única vez (consumido pela análise ao vivo e pelos formatadores)."""
+    return {
+        "shots_total": _first(side_stats, SHOTS_TOTAL_KEYS),
+        "shots_on": _first(side_stats, SHOTS_ON_KEYS),
+        "corners": _first(side_stats, CORNERS_KEYS),
+        "yellows": _first(side_stats, YELLOWS_KEYS),
+        "reds": _first(side_stats, REDS_KEYS),
+        "possession": _first(side_stats, POSSESSION_KEYS),
+        "fouls": _first(side_stats, FOULS_KEYS),
+        "offsides": _first(side_stats, OFFSIDES_KEYS),
+    }
+
+def _radar_canon(radar_data: Dict) -> Dict[str, Dict[str, Any]]:
+    if canon := radar_data.get("canon"):
+        return canon
+    stats = radar_data.get("statistics", {})
+    return {"home": _canon_side(stats.get("home", {})), "away": _canon_side(stats.get("away", {}))}
 
-def stats_aovivo(game_id: int):
-    ck = f"radar_stats_{game_id}_full"
+def stats_aovivo(game_id: int, max_events: Optional[int] = 20):
+    """
+    Stats + eventos do jogo ao vivo. Devolve só os max_events eventos mais recentes (None = todos);
+    a estimativa de acréscimos é calculada antes do corte, sobre a lista completa.
+    """
+    ck = f"radar_stats_{game_id}_full_{max_events}"
     cached = _radar_cache_get(ck)
     if cached is not None:
         return cached
     try:
         # ... (toda a lógica de busca de fixture, stats e events continua igual) ...
-        fixture_resp = api_get_raw("fixtures", params={"id": game_id})
+        fixture_resp = cached_api("fixtures", params={"id": game_id}, ttl=LIVE_CACHE_TTL)
         if not fixture_resp or not fixture_resp.get("response"):
             print(f"ERRO: Fixture {game_id} não encontrado em radar_ia.")
             return None
@@ -585,7 +872,7 @@ def stats_aovivo(game_id: int):
 
         home_id = fixture.get("teams", {}).get("home", {}).get("id")
 
-        stats_resp = api_get_raw("fixtures/statistics", params={"fixture": game_id})
+        stats_resp = cached_api("fixtures/statistics", params={"fixture": game_id}, ttl=LIVE_CACHE_TTL)
         full_stats = {"home": {}, "away": {}}
         if stats_resp and stats_resp.get("response"):
             for team_stats in stats_resp["response"]:
@@ -597,67 +884,82 @@ def stats_aovivo(game_id: int):
                     tmp[k] = try_int(s.get("value"))
                 full_stats[side].update(tmp)
 
-        events_resp = api_get_raw("fixtures/events", params={"fixture": game_id})
+        events_resp = cached_api("fixtures/events", params={"fixture": game_id}, ttl=LIVE_CACHE_TTL)
         events = events_resp.get("response", []) if events_resp else []
+        status = fixture.get("fixture", {}).get("status", {})
+        elapsed = status.get("elapsed", 0)
+        # Bloco de acréscimos: só nessas janelas a estimativa precisa de todos os eventos do tempo
+        extra_half = 1 if 35 <= elapsed <= 55 else 2 if 80 <= elapsed <= 120 else None # Intervalo maior para garantir
+
+        # ordena só as chaves (minuto + acréscimo) e materializa os dicts já na ordem final;
+        # fora da janela de acréscimos basta o top-K (heapq.nlargest mantém a mesma ordem do sort estável)
+        times = [ev.get("time") or _EMPTY for ev in events]
+        keys = [(t.get("elapsed") or 0) + (t.get("extra") or 0) for t in times]
+        if max_events is None or extra_half is not None:
+            order = sorted(range(len(events)), key=keys.__getitem__, reverse=True)
+        else:
+            order = heapq.nlargest(max_events, range(len(events)), key=keys.__getitem__)
         processed = []
-        for ev in events:
-            t = ev.get("time", {})
+        for i in order:
+            ev, t = events[i], times[i]
             elapsed, extra = t.get("elapsed"), t.get("extra")
-            _sort_key = (elapsed or 0) + (extra or 0)
             processed.append({
                 "display_time": f"{elapsed}+{extra}'" if extra else f"{elapsed}'",
                 "category": classify_event(ev),
                 "detail": ev.get("detail"),
                 "player": ev.get("player", {}).get("name"),
-                "_sort": _sort_key
+                "_sort": keys[i]
             })
-        processed.sort(key=lambda x: x["_sort"], reverse=True)
 
         result = {
             "fixture": fixture,
             "teams": fixture.get("teams", {}),
             "score": fixture.get("score", {}),
             "goals": fixture.get("goals", {}),
-            "status": fixture.get("fixture", {}).get("status", {}),
+            "status": status,
             "statistics": full_stats,
-            "events": processed,
+            "canon": {"home": _canon_side(full_stats["home"]), "away": _canon_side(full_stats["away"])},
+            "events": processed if max_events is None else processed[:max_events],
         }
-        
-        # Bloco de acréscimos
-        elapsed = result.get("status", {}).get("elapsed", 0)
-        if 35 <= elapsed <= 55: # Intervalo maior para garantir
-             result["extra_time_est"] = {"half": 1, "minutes": _estimate_extra_time(processed, half=1)}
-        elif 80 <= elapsed <= 120:
-             result["extra_time_est"] = {"half": 2, "minutes": _estimate_extra_time(processed, half=2)}
+        if extra_half is not None:
+            result["extra_time_est"] = {"half": extra_half, "minutes": _estimate_extra_time(processed, half=extra_half)}
 
         _radar_cache_set(ck, result)
         return result
     except Exception:
-        traceback.print_exc()
+        log.exception("stats_aovivo(%s)", game_id)
         return None
 
+# Segundos de acréscimo por categoria de evento (categoria já vem de classify_event, em minúsculas)
+_EXTRA_SEC = {
+    "gol": 60,
+    "substituição": 30,
+    "cartão vermelho": 90,
+    "cartão amarelo": 20,
+}
+
 # NOVO: Função auxiliar para calcular acréscimos
 def _estimate_extra_time(events: list, half: int = 1) -> int:
     total_seconds = 0
     start_minute = 0 if half == 1 else 45
     end_minute = 45 if half == 1 else 120 # Limite alto para pegar prorrogação
 
-    for ev in events:
+    # stats_aovivo entrega os eventos ordenados por _sort decrescente: a virada dos 45' sai por busca binária
+    cut = bisect.bisect_left(events, -45, key=lambda ev: -ev.get("_sort", 0))
+    for ev in (events[cut:] if half == 1 else events[:cut]):
         minute = ev.get("_sort", 0) # Usar o _sort que já tem o tempo em minutos
         if not (start_minute < minute <= end_minute):
             continue
-        
-        detail = (ev.get("detail") or "").lower()
-        cat = ev.get("category", "").lower()
-
-        # Usando os tempos que você especificou
-        if "goal" in detail: total_seconds += 60
-        elif "var" in detail: total_seconds += 90
-        elif "substitution" in cat: total_seconds += 30
-        elif "red card" in detail: total_seconds += 90
-        elif "yellow card" in detail: total_seconds += 20
+
+        # Usando os tempos que você especificou — um lookup por evento em vez de várias buscas de substring
+        cat = (ev.get("category") or "").lower()
+        # VAR continua vindo do detail (como antes): o evento type "Var" sem palavra-chave não conta
+        if cat != "gol" and "var" in (ev.get("detail") or "").lower():
+            total_seconds += 90
+        else:
+            total_seconds += _EXTRA_SEC.get(cat, 0)
         # A API não detalha todas as faltas, então não adicionamos aqui para não inflar o valor
-    
+
     # Adiciona uma base mínima de 1 minuto para compensar outras paradas
     if total_seconds > 0:
         total_seconds += 60
@@ -666,237 +968,152 @@ def _estimate_extra_time(events: list, half: int = 1) -> int:
 # =========================
 # OPTA IA (análise de jogador) - expandida
 # =========================
-def get_players_for_team(team_id: int, season: int = datetime.now().year) -> Optional[List[Dict]]:
+# Temporada padrão: calculada uma vez por dia (defaults de função seriam fixados no import)
+_SEASON = {"year": 0, "expires": 0.0}
+
+def current_season() -> int:
+    now = time.time()
+    if now >= _SEASON["expires"]:
+        today = datetime.now()
+        tomorrow = datetime.combine(today.date() + timedelta(days=1), datetime.min.time())
+        _SEASON["year"] = today.year
+        _SEASON["expires"] = tomorrow.timestamp()
+    return _SEASON["year"]
+
+def _fetch_team_players_raw(team_id: int, season: int) -> Optional[List[Dict]]:
+    """/players?team=&season= com o bloco de statistics completo de cada jogador (cacheado)."""
     if not API_SPORTS_KEY:
         print("ERRO: A variável de ambiente API_SPORTS_KEY não está definida.")
         return None
+    ck = f"teamplayers:{team_id}:{season}"
+    cached = _cache_get(ck)
+    if cached is not None:
+        return cached
     try:
         params = {'team': team_id, 'season': season}
-        r = requests.get(f"{API_URL_BASE}/players", headers=HEADERS, params=params, timeout=15)
+        r = _SESSION.get(f"{API_URL_BASE}/players", params=params, timeout=15)
         r.raise_for_status()
-        data = r.json().get('response', [])
-        players = []
-        for item in data:
-            p = item.get('player', {}) or {}
-            players.append({"id": p.get("id"), "name": p.get("name")})
-        return players
+        data = orjson.loads(r.content).get('response', [])
+        _cache_set(ck, data, ttl=PLAYER_CACHE_TTL)
+        return data
     except Exception as e:
         print(f"ERRO ao buscar jogadores para o time {team_id}: {e}")
         return None
 
+def get_players_for_team(team_id: int, season: Optional[int] = None) -> Optional[List[Dict]]:
+    data = _fetch_team_players_raw(team_id, season or current_season())
+    if data is None:
+        return None
+    players = []
+    for item in data:
+        p = item.get('player') or _EMPTY
+        players.append({"id": p.get("id"), "name": p.get("name")})
+    return players
+
 def _sum_stat_if_exists(aggregated, category, key):
     try:
         return aggregated.get(category, {}).get(key, 0.0)
     except Exception:
         return 0.0
 
+# Únicos campos (categoria, chave, métrica) de estatística de jogador consumidos pela análise
+PLAYER_STAT_FIELDS = (
+    ("goals", "total", "avg_goals"),
+    ("goals", "assists", "avg_assists"),
+    ("shots", "total", "avg_shots_total"),
+    ("shots", "on", "avg_shots_on"),
+    ("passes", "total", "avg_passes"),
+)
+
+def _entry_appearances(entry: Dict) -> int:
+    games_block = entry.get("games") or _EMPTY
+    return safe_int(games_block.get("appearences", 0) or games_block.get("appearances", 0) or games_block.get("played", 0))
+
+def _aggregate_player_totals(rows: List[List[float]]) -> List[float]:
+    """Soma coluna a coluna da matriz [jogos, *PLAYER_STAT_FIELDS] (uma linha por entrada de statistics)."""
+    if not rows:
+        return [0] + [0.0] * len(PLAYER_STAT_FIELDS)
+    return list(map(sum, zip(*rows)))
+
+# rótulos de key_stats: "Jogos" + uma média por campo de PLAYER_STAT_FIELDS (mesma ordem)
+KEY_STAT_LABELS = ("Jogos", "Gols (média)", "Assistências (média)", "Remates (média)", "Remates no Gol (média)", "Passes (média)")
+
+# (métrica, limiar estrito, mercado, template da recomendação, confiança, template do motivo) — avaliadas em ordem.
+# Templates formatados com format_map(metrics): cada regra guarda seu texto uma vez só.
+REC_RULES = (
+    ("avg_goals", 0.4, "Jogador para Marcar", "Sim", lambda v: min(0.8, v), "Média de {avg_goals:.2f} gols/jogo."),
+    ("avg_shots_on", 1.0, "Remates no Gol", "Mais de 0.5", lambda v: min(0.75, v / 1.5), "Média de {avg_shots_on:.2f} remates no alvo."),
+    ("avg_shots_total", 2.0, "Total de Remates", "Mais de 1.5", lambda v: min(0.70, v / 3), "Média de {avg_shots_total:.2f} remates totais."),
+    ("avg_passes", 40, "Passes do Jogador", "Mais de {passes_line}", lambda v: 0.6, "Média alta de {avg_passes:.2f} passes."),
+)
+
 def process_and_analyze_stats(player_data: Dict) -> Dict:
-    stats_list = player_data.get("statistics", []) or []
-    aggregated = defaultdict(lambda: defaultdict(float))
-    total_games = 0
-
-    for entry in stats_list:
-        games_block = entry.get("games", {}) or {}
-        appearances = safe_int(games_block.get("appearences", 0) or games_block.get("appearances", 0) or games_block.get("played", 0))
-        if appearances <= 0:
-            continue
-        total_games += appearances
-        for category, block in entry.items():
-            if isinstance(block, dict):
-                for k, v in block.items():
-                    try:
-                        aggregated[category][k] += float(v or 0)
-                    except Exception:
-                        pass
-
-    if total_games == 0:
+    # filtra antes as entradas sem jogos (reservas costumam ter várias competições zeradas)
+    valid = [(apps, entry) for entry in player_data.get("statistics", []) or [] if (apps := _entry_appearances(entry)) > 0]
+    if not valid:
         return {"key_stats": {}, "recommendations": [{"market": "N/A", "recommendation": "Dados insuficientes", "confidence": 0, "reason": "Jogador sem partidas"}]}
 
-    avg_goals = (aggregated.get('goals', {}).get('total', 0)) / total_games
-    avg_assists = (aggregated.get('goals', {}).get('assists', 0)) / total_games
-    avg_shots_total = (aggregated.get('shots', {}).get('total', 0)) / total_games
-    avg_shots_on = (aggregated.get('shots', {}).get('on', 0)) / total_games
-    avg_passes = (aggregated.get('passes', {}).get('total', 0)) / total_games
-
-    key_stats = {
-        "Jogos": f"{int(total_games)}",
-        "Gols (média)": f"{avg_goals:.2f}",
-        "Assistências (média)": f"{avg_assists:.2f}",
-        "Remates (média)": f"{avg_shots_total:.2f}",
-        "Remates no Gol (média)": f"{avg_shots_on:.2f}",
-        "Passes (média)": f"{avg_passes:.2f}"
-    }
+    total_games, *totals = _aggregate_player_totals(
+        [[apps] + [float((entry.get(category) or _EMPTY).get(key) or 0) for category, key, _ in PLAYER_STAT_FIELDS] for apps, entry in valid]
+    )
+
+    # médias por jogo, nomeadas pelo attr_name de PLAYER_STAT_FIELDS (consumidas por REC_RULES)
+    metrics = {name: t / total_games for (_, _, name), t in zip(PLAYER_STAT_FIELDS, totals)}
 
-    recs = []
-    if avg_goals > 0.4:
-        recs.append({"market": "Jogador para Marcar", "recommendation": "Sim", "confidence": min(0.8, avg_goals), "reason": f"Média de {avg_goals:.2f} gols/jogo."})
-    if avg_shots_on > 1.0:
-        recs.append({"market": "Remates no Gol", "recommendation": "Mais de 0.5", "confidence": min(0.75, avg_shots_on / 1.5), "reason": f"Média de {avg_shots_on:.2f} remates no alvo."})
-    if avg_shots_total > 2.0:
-        recs.append({"market": "Total de Remates", "recommendation": "Mais de 1.5", "confidence": min(0.70, avg_shots_total / 3), "reason": f"Média de {avg_shots_total:.2f} remates totais."})
-    if avg_passes > 40:
-        recs.append({"market": "Passes do Jogador", "recommendation": f"Mais de {int(avg_passes - 10)}", "confidence": 0.6, "reason": f"Média alta de {avg_passes:.2f} passes."})
+    # a API devolve os valores já formatados (string) — mesmo contrato de antes
+    key_stats = dict(zip(KEY_STAT_LABELS, [str(int(total_games))] + [f"{metrics[name]:.2f}" for _, _, name in PLAYER_STAT_FIELDS]))
+
+    metrics["passes_line"] = int(metrics["avg_passes"] - 10)
+    recs = [
+        {"market": market, "recommendation": rec.format_map(metrics), "confidence": conf(metrics[k]), "reason": reason.format_map(metrics)}
+        for k, thr, market, rec, conf, reason in REC_RULES if metrics[k] > thr
+    ]
 
     if not recs:
         recs.append({"market": "Análise", "recommendation": "Sem recomendação clara", "confidence": 0.2, "reason": "Baixa participação ofensiva."})
 
     return {"key_stats": key_stats, "recommendations": recs}
 
-    # Função utilitária para pegar estatísticas de categorias diferentes de forma segura
-    def get_stat(cat, key):
-        return aggregated.get(cat, {}).get(key, 0.0)
-
-    # Tentativas de normalizar vários nomes que a API pode usar
-    goals_total = get_stat('goals', 'total') or get_stat('goals', 'goals') or 0.0
-    assists_total = get_stat('goals', 'assists') or get_stat('goals', 'assists_total') or 0.0
-
-    # Shots: pode aparecer em 'shots' ou 'shots' categoria com keys 'total'/'on'/'off'/'blocked'
-    shots_total = get_stat('shots', 'total') or get_stat('shots', 'shots_total') or get_stat('shots', 'shots') or 0.0
-    shots_on = get_stat('shots', 'on') or get_stat('shots', 'on_target') or get_stat('shots', 'shots_on') or 0.0
-    shots_blocked = get_stat('shots', 'blocked') or get_stat('shots', 'blocks') or 0.0
-    shots_off = shots_total - shots_on if shots_total and shots_on else get_stat('shots', 'off') or 0.0
-
-    passes_total = get_stat('passes', 'total') or 0.0
-    key_passes = get_stat('passes', 'key') or get_stat('passes', 'key_passes') or 0.0
-
-    tackles_total = get_stat('tackles', 'total') or 0.0
-    interceptions = get_stat('tackles', 'interceptions') or 0.0
-
-    # Estimativa simples de 'rebotes' (se há estatística direta, usa; senão tenta inferir)
-    rebounds_raw = get_stat('rebounds', 'total') or get_stat('shots', 'rebounds') or 0.0
-    if not rebounds_raw:
-        # inferência aproximada: bloqueados + remates fora (não é preciso, mas dá um proxy)
-        rebounds_raw = shots_blocked or 0.0
-
-    # médias por jogo
-    avg_goals = goals_total / total_games
-    avg_assists = assists_total / total_games
-    avg_shots_total = shots_total / total_games
-    avg_shots_on = shots_on / total_games
-    avg_passes = passes_total / total_games
-    avg_key_passes = key_passes / total_games
-    avg_rebounds = rebounds_raw / total_games if total_games else 0.0
-
-    key_stats = {
-        "Jogos (aparições)": f"{int(total_games)}",
-        "Gols (média/jogo)": f"{avg_goals:.2f}",
-        "Assistências (média/jogo)": f"{avg_assists:.2f}",
-        "Remates (média/jogo)": f"{avg_shots_total:.2f}",
-        "Remates no Gol (média/jogo)": f"{avg_shots_on:.2f}",
-        "Passes (média/jogo)": f"{avg_passes:.2f}",
-        "Key Passes (média/jogo)": f"{avg_key_passes:.2f}",
-        "Rebotes (estim.) (média/jogo)": f"{avg_rebounds:.2f}"
+def _build_player_analysis(player_data: Dict) -> Dict:
+    player = player_data.get('player') or _EMPTY
+    player_info = {
+        "id": player.get('id'),
+        "name": player.get('name'),
+        "team": (player_data.get('statistics', [{}])[0].get('team') or _EMPTY).get('name'),
     }
-
-    recommendations = []
-
-    # Recomendação primária: Jogador para Marcar
-    if avg_goals > 0.35:
-        rec_conf = min(0.95, avg_goals / 0.7)  # escala a confiança
-        recommendations.append({
-            "market": "Jogador para Marcar",
-            "recommendation": "Sim",
-            "confidence": rec_conf,
-            "reason": f"Média de {avg_goals:.2f} gol(s) por jogo nas últimas aparições."
-        })
-    else:
-        # Se poucos golos mas muitos remates: sugerir mercado 'Chutes no Gol' ou 'Remates'
-        if avg_shots_on >= 0.6:
-            recommendations.append({
-                "market": "Chutes no Gol",
-                "recommendation": "Acima de 0.5",
-                "confidence": min(0.60, avg_shots_on / 2),
-                "reason": f"Média de {avg_shots_on:.2f} remates no golo por jogo."
-            })
-        elif avg_shots_total >= 1.2:
-            recommendations.append({
-                "market": "Remates (m/jogo)",
-                "recommendation": f"Acima de {max(1, int(avg_shots_total))}",
-                "confidence": min(0.55, avg_shots_total / 3),
-                "reason": f"Média de {avg_shots_total:.2f} remates por jogo."
-            })
-        else:
-            recommendations.append({
-                "market": "Jogador para Marcar",
-                "recommendation": "Não",
-                "confidence": 0.18,
-                "reason": "Média de golos baixa — sugestão conservadora."
-            })
-
-    # Assistências
-    if avg_assists >= 0.25:
-        recommendations.append({
-            "market": "Assistências (jogador)",
-            "recommendation": "Acima de 0.5",
-            "confidence": min(0.65, avg_assists / 0.5),
-            "reason": f"Média de {avg_assists:.2f} assistências por jogo."
-        })
-
-    # Passes / Key passes
-    if avg_passes > 20:
-        recommendations.append({
-            "market": "Passes (m/jogo)",
-            "recommendation": f"Acima de {int(max(20, (avg_passes//5)*5))}",
-            "confidence": min(0.5, avg_passes / 100),
-            "reason": f"Média de {avg_passes:.2f} passes por jogo."
-        })
-    if avg_key_passes >= 0.8:
-        recommendations.append({
-            "market": "Key Passes (jogador)",
-            "recommendation": "Acima de 0.5",
-            "confidence": min(0.5, avg_key_passes / 2),
-            "reason": f"Média de {avg_key_passes:.2f} key passes por jogo."
-        })
-
-    # Rebounds / remates bloqueados
-    if avg_rebounds >= 0.3:
-        recommendations.append({
-            "market": "Rebotes/Remates bloqueados (estim.)",
-            "recommendation": "Acima de 0.5",
-            "confidence": min(0.45, avg_rebounds / 1),
-            "reason": f"Estimativa de {avg_rebounds:.2f} por jogo (base em remates bloqueados/estatísticas disponíveis)."
-        })
-
-    # Guarantee at least one recommendation (shouldn't be empty)
-    if not recommendations:
-        recommendations.append({
+    analysis_result = process_and_analyze_stats(player_data)
+    # ensure there is at least one recommendation
+    recs = analysis_result.get("recommendations") or []
+    if not recs:
+        recs = [{
             "market": "Jogador para Marcar",
             "recommendation": "Não",
             "confidence": 0.15,
-            "reason": "Dados limitados: nenhuma métrica suficientemente forte para recomendação positiva."
-        })
-
-    return {"key_stats": key_stats, "recommendations": recommendations}
+            "reason": "Dados limitados — fallback conservador."
+        }]
+        analysis_result["recommendations"] = recs
+    return {"player_info": player_info, **analysis_result}
 
-def analyze_player(player_id: int, season: int = datetime.now().year) -> Optional[Dict]:
+def analyze_player(player_id: int, season: Optional[int] = None) -> Optional[Dict]:
     if not API_SPORTS_KEY:
         print("ERRO: A variável de ambiente API_SPORTS_KEY não está definida.")
         return None
+    season = season or current_season()
+    ck = f"player:{player_id}:{season}"
+    cached = _cache_get(ck)
+    if cached is not None:
+        return cached
     try:
         params = {'id': player_id, 'season': season}
-        r = requests.get(f"{API_URL_BASE}/players", headers=HEADERS, params=params, timeout=20)
+        r = _SESSION.get(f"{API_URL_BASE}/players", params=params, timeout=20)
         r.raise_for_status()
-        api_resp = r.json().get('response', [])
+        api_resp = orjson.loads(r.content).get('response', [])
         if not api_resp:
             return None
 
-        player_data = api_resp[0]
-        player_info = {
-            "name": player_data.get('player', {}).get('name'),
-            "team": (player_data.get('statistics', [{}])[0].get('team', {}) or {}).get('name'),
-        }
-        analysis_result = process_and_analyze_stats(player_data)
-        # ensure there is at least one recommendation
-        recs = analysis_result.get("recommendations") or []
-        if not recs:
-            recs = [{
-                "market": "Jogador para Marcar",
-                "recommendation": "Não",
-                "confidence": 0.15,
-                "reason": "Dados limitados — fallback conservador."
-            }]
-            analysis_result["recommendations"] = recs
-        return {"player_info": player_info, **analysis_result}
+        result = _build_player_analysis(api_resp[0])
+        _cache_set(ck, result, ttl=PLAYER_CACHE_TTL)
+        return result
     except requests.exceptions.RequestException as e:
         print(f"ERRO de API ao analisar jogador {player_id}: {e}")
         return None
@@ -904,12 +1121,35 @@ def analyze_player(player_id: int, season: int = datetime.now().year) -> Optiona
         print(f"ERRO interno ao analisar jogador {player_id}: {e}")
         return None
 
-def analyze_player_stats(player_id: int, season: int = datetime.now().year):
+def analyze_team_players(team_id: int, season: Optional[int] = None, limit: Optional[int] = None) -> Optional[List[Dict]]:
+    """
+    Analisa o elenco (ou só os `limit` primeiros) com uma única chamada /players?team=&season=
+    (a resposta já traz as statistics), em vez de um /players?id= por jogador.
+    Não alimenta o cache de analyze_player: as statistics aqui são do time e só da primeira página.
+    """
+    season = season or current_season()
+    data = _fetch_team_players_raw(team_id, season)
+    if data is None:
+        return None
+    analyses = []
+    for item in data[:limit]:
+        try:
+            analyses.append(_build_player_analysis(item))
+        except Exception as e:
+            print(f"ERRO interno ao analisar jogador do time {team_id}: {e}")
+    return analyses
+
+def analyze_player_stats(player_id: int, season: Optional[int] = None):
     return analyze_player(player_id, season)
 
 # =========================
 # FORMATAÇÃO das saídas textuais (WhatsApp-friendly)
 # =========================
+# Linhas de recomendação (mesmo texto em todo render, formatadas com str.format)
+_TIP_TEMPLATE = "- *{market}*: {recommendation} (conf: {conf}) — {reason}"
+_PLAYER_REC_TEMPLATE = "- {market}: {recommendation} (conf: {conf}) — {reason}"
+_FEATURED_REC_TEMPLATE = "  - *{market}*: {recommendation} (conf: {conf}) — {reason}"
+
 def format_player_analysis(player_analysis: dict) -> str:
     if not player_analysis or not player_analysis.get("player_info"):
         return "❌ Não foi possível obter análise para este jogador."
@@ -920,17 +1160,15 @@ def format_player_analysis(player_analysis: dict) -> str:
     key_stats = player_analysis.get("key_stats", {})
     if key_stats:
         lines.append("\n📊 *Estatísticas principais*:")
-        for k, v in key_stats.items():
-            lines.append(f"- {k}: {v}")
+        lines.append("\n".join(f"- {k}: {v}" for k, v in key_stats.items()))
 
     recs = player_analysis.get("recommendations", [])
     if recs:
         lines.append("\n💡 *Recomendações:*")
-        for r in recs:
-            conf_txt = format_conf_pct(r.get("confidence"))
-            lines.append(
-                f"- {r['market']}: {r['recommendation']} (conf: {conf_txt}) — {r['reason']}"
-            )
+        lines.append("\n".join(
+            _PLAYER_REC_TEMPLATE.format(market=r['market'], recommendation=r['recommendation'], conf=format_conf_pct(r.get("confidence")), reason=r['reason'])
+            for r in recs
+        ))
     else:
         lines.append("\n_Sem recomendações disponíveis._")
 
@@ -979,11 +1217,13 @@ def format_full_pre_game_analysis(game_analysis: dict, players_analysis: list) -
                 if not recs:
                     lines.append("  - Sem dicas de aposta específicas.")
                 else:
-                    for rec in recs:
-                        conf_txt = format_conf_pct(rec.get("confidence"))
-                        lines.append(
-                            f"  - *{rec.get('market')}*: {rec.get('recommendation')} (conf: {conf_txt}) — {rec.get('reason','')}"
+                    lines.append("\n".join(
+                        _FEATURED_REC_TEMPLATE.format(
+                            market=rec.get('market'), recommendation=rec.get('recommendation'),
+                            conf=format_conf_pct(rec.get("confidence")), reason=rec.get('reason', ''),
                         )
+                        for rec in recs
+                    ))
 
     lines.append(
         "\n_Lembre-se: analise por conta própria — estas são sugestões automáticas._"
@@ -1004,8 +1244,9 @@ def analyze_live_from_stats(radar_data: Dict) -> List[Dict]:
     if not radar_data: return []
 
     tips = []
-    stats = radar_data.get("statistics", {})
-    home_stats, away_stats = stats.get("home", {}), stats.get("away", {})
+    append = tips.append
+    canon = _radar_canon(radar_data)
+    home_c, away_c = canon["home"], canon["away"]
     status = radar_data.get("status", {})
     elapsed = status.get("elapsed", 0)
     
@@ -1013,159 +1254,50 @@ def analyze_live_from_stats(radar_data: Dict) -> List[Dict]:
     home_goals, away_goals = score.get("home", 0), score.get("away", 0)
     total_goals = home_goals + away_goals
 
-    def get_stat(side_stats, *keys):
-        for k in keys:
-            if k in side_stats: return side_stats.get(k, 0)
-        return 0
-
-    home_shots_total = get_stat(home_stats, 'total_shots', 'shots_total')
-    away_shots_total = get_stat(away_stats, 'total_shots', 'shots_total')
+    home_shots_total, away_shots_total = home_c["shots_total"], away_c["shots_total"]
     total_shots = home_shots_total + away_shots_total
-    home_shots_on = get_stat(home_stats, 'shots_on_goal', 'shots_on_target')
-    away_shots_on = get_stat(away_stats, 'shots_on_goal', 'shots_on_target')
-    home_corners = get_stat(home_stats, 'corner_kicks', 'corners')
-    away_corners = get_stat(away_stats, 'corner_kicks', 'corners')
+    home_shots_on, away_shots_on = home_c["shots_on"], away_c["shots_on"]
+    home_corners, away_corners = home_c["corners"], away_c["corners"]
     total_corners = home_corners + away_corners
 
-    def add_tip(market, rec, reason, conf):
-        # Evita adicionar a mesma recomendação duas vezes
-        if not any(t['market'] == market and t['recommendation'] == rec for t in tips):
-            tips.append({"market": market, "recommendation": rec, "reason": reason, "confidence": conf})
+    # Derivados calculados uma vez só: ritmo de cantos (1 a cada 7') e pressão de cada lado
+    corners_pace = elapsed / 7
+    home_pressure = home_shots_on * 1.5 + home_corners
+    away_pressure = away_shots_on * 1.5 + away_corners
+    pressure_diff = home_pressure - away_pressure
 
+    # Cada regra abaixo produz um par mercado/recomendação distinto, então não há risco de duplicata
     # Lógica de Gols
     if 15 < elapsed < 80 and total_shots > 8:
-        add_tip("Total de Gols", f"Mais de {total_goals + 0.5}", f"{total_shots} remates, jogo aberto", 0.75)
+        append({"market": "Total de Gols", "recommendation": f"Mais de {total_goals + 0.5}", "reason": f"{total_shots} remates, jogo aberto", "confidence": 0.75})
     
     if elapsed > 65 and total_shots < 12 :
-        add_tip("Total de Gols", f"Menos de {total_goals + 1.5}", "Jogo com pouca criação", 0.70)
+        append({"market": "Total de Gols", "recommendation": f"Menos de {total_goals + 1.5}", "reason": "Jogo com pouca criação", "confidence": 0.70})
     
     # Lógica de Escanteios
     if 25 < elapsed < 85:
-        if total_corners > (elapsed / 7): # Média alta de cantos
-            add_tip("Escanteios Asiáticos", f"Mais de {total_corners + 1.5}", f"Média alta de cantos ({total_corners})", 0.68)
+        if total_corners > corners_pace: # Média alta de cantos
+            append({"market": "Escanteios Asiáticos", "recommendation": f"Mais de {total_corners + 1.5}", "reason": f"Média alta de cantos ({total_corners})", "confidence": 0.68})
         
     # Lógica de Resultado e Pressão
-    pressure_diff = (home_shots_on * 1.5 + home_corners) - (away_shots_on * 1.5 + away_corners)
     if elapsed > 50 and home_goals == away_goals:
         if pressure_diff > 3.5:
-            add_tip("Próximo Gol", "Casa", f"Casa pressionando mais ({pressure_diff:.1f})", 0.72)
+            append({"market": "Próximo Gol", "recommendation": "Casa", "reason": f"Casa pressionando mais ({pressure_diff:.1f})", "confidence": 0.72})
         elif pressure_diff < -3.5:
-            add_tip("Próximo Gol", "Visitante", f"Visitante pressionando mais ({pressure_diff:.1f})", 0.72)
+            append({"market": "Próximo Gol", "recommendation": "Visitante", "reason": f"Visitante pressionando mais ({pressure_diff:.1f})", "confidence": 0.72})
 
     # Dica de fallback para garantir pelo menos 2-3 dicas
     if len(tips) < 2 and elapsed > 20:
         if home_shots_on > 1 and away_shots_on > 1:
-            add_tip("Ambas Marcam", "Sim", "Ambos times finalizam", 0.60)
+            append({"market": "Ambas Marcam", "recommendation": "Sim", "reason": "Ambos times finalizam", "confidence": 0.60})
         else:
-            add_tip("Dupla Chance", "Casa ou Fora", "Jogo indefinido", 0.55)
+            append({"market": "Dupla Chance", "recommendation": "Casa ou Fora", "reason": "Jogo indefinido", "confidence": 0.55})
 
     if not tips:
-        add_tip("Análise", "Aguardando Oportunidade", "Nenhum mercado com valor claro no momento", 0.30)
+        append({"market": "Análise", "recommendation": "Aguardando Oportunidade", "reason": "Nenhum mercado com valor claro no momento", "confidence": 0.30})
     
     tips.sort(key=lambda x: x['confidence'], reverse=True)
     return tips[:3]
-    # =========================
-    # 🔮 Estimativa de acréscimos baseada em eventos
-    # =========================
-    def estimate_extra_time(events: list, half: int = 1) -> int:
-        total_seconds = 0
-        for ev in events:
-            minute = ev.get("time", {}).get("elapsed") or 0
-
-            # filtra eventos por tempo
-            if half == 1 and minute > 45:
-                continue
-            if half == 2 and minute <= 45:
-                continue
-
-            cat = ev.get("category", "").lower()
-            if "falta" in cat:
-                total_seconds += 15
-            elif "amarelo" in cat:
-                total_seconds += 30
-            elif "gol" in cat:
-                total_seconds += 60
-            elif "var" in cat:
-                start = ev.get("start_time")
-                end = ev.get("end_time")
-                if start and end:
-                    total_seconds += max(int(end - start), 60)
-                else:
-                    total_seconds += 60
-        return (total_seconds + 59) // 60
-
-    # só armazena no radar_data, não vira dica de aposta
-    if 35 <= elapsed < 45:
-        radar_data["extra_time_est"] = {
-            "half": 1,
-            "minutes": estimate_extra_time(radar_data.get("events", []), half=1)
-        }
-
-    if 80 <= elapsed < 90:
-        radar_data["extra_time_est"] = {
-            "half": 2,
-            "minutes": estimate_extra_time(radar_data.get("events", []), half=2)
-        }
-
-    # =========================
-    # Sugestões baseadas em estatísticas
-    # =========================
-    if elapsed > 20:
-        if total_shots > 7 and total_goals < 2:
-            add_tip("Gols Asiáticos", f"Mais de {total_goals + 0.5}",
-                    f"{total_shots} remates totais", 0.70)
-        elif total_shots < 3:
-            add_tip("Gols Asiáticos", f"Menos de {total_goals + 1.5}",
-                    f"Apenas {total_shots} remates", 0.65)
-
-    if (home_shots_total or 0) > 3 and (away_shots_total or 0) > 3 and total_goals < 3:
-        add_tip("Ambas Marcam", "Sim",
-                f"Ambas as equipas rematam ({home_shots_total} vs {away_shots_total})", 0.75)
-
-    # ⚽ Escanteios
-    if elapsed > 25:
-        if total_corners >= 7:
-            add_tip("Escanteios Asiáticos", f"Mais de {total_corners + 1.5}",
-                    f"{total_corners} escanteios já cobrados", 0.72)
-        elif total_shots > 10 and total_corners < 5:
-            if home_shots_total > away_shots_total:
-                add_tip("Escanteios (Equipe)", "Próximo escanteio para o Time da Casa",
-                        "Casa pressiona forte mas tem poucos cantos", 0.65)
-            else:
-                add_tip("Escanteios (Equipe)", "Próximo escanteio para o Time Visitante",
-                        "Visitante pressiona forte mas tem poucos cantos", 0.65)
-
-    # ⚡ Heurística de pressão ofensiva
-    if home_shots_total - away_shots_total >= 8 and home_shots_on >= 3:
-        add_tip("Resultado Final", "Vitória do Time da Casa",
-                f"Domínio ofensivo: {home_shots_total} x {away_shots_total} remates", 0.78)
-        add_tip("Próximo Gol", "Casa",
-                f"Alta pressão ofensiva ({home_shots_total} remates, {home_shots_on} no alvo)", 0.75)
-
-    elif away_shots_total - home_shots_total >= 8 and away_shots_on >= 3:
-        add_tip("Resultado Final", "Vitória do Time Visitante",
-                f"Domínio ofensivo: {away_shots_total} x {home_shots_total} remates", 0.78)
-        add_tip("Próximo Gol", "Visitante",
-                f"Alta pressão ofensiva ({away_shots_total} remates, {away_shots_on} no alvo)", 0.75)
-
-    if elapsed > 75:
-        if total_goals == 0:
-            add_tip("Total de Gols", "Menos de 1.5",
-                    "Poucos golos e pouco tempo restante", 0.85)
-        elif home_goals > away_goals:
-            add_tip("Resultado Final", "Vitória do Time da Casa",
-                    "Time da casa a segurar o resultado", 0.70)
-
-    # fallback se não gerar nenhuma dica
-    if not tips:
-        if total_shots >= 6:
-            add_tip("Total de Gols", "Mais de 1.5",
-                    "Sugestão baseada na atividade de remates", 0.45)
-        else:
-            add_tip("Total de Gols", "Menos de 2.5",
-                    "Sugestão conservadora devido a pouca atividade", 0.40)
-
-    return tips
 
 
 # =========================
@@ -1195,18 +1327,17 @@ def format_live_analysis(radar_data: Dict, tips: List[Dict]) -> str:
     lines.append("--------------------------------------------")
     lines.append("📊 *Estatísticas do Jogo*")
 
-    stats = radar_data.get("statistics", {})
-    home_stats, away_stats = stats.get("home", {}), stats.get("away", {})
-    def gs(s, *k):
-        for key in k:
-            if key in s: return s.get(key, 0)
-        return 0
+    canon = _radar_canon(radar_data)
+    hc, ac = canon["home"], canon["away"]
 
-    lines.append(f"- Remates: {gs(home_stats, 'total_shots')} x {gs(away_stats, 'total_shots')}")
-    lines.append(f"- Remates no Gol: {gs(home_stats, 'shots_on_goal')} x {gs(away_stats, 'shots_on_goal')}")
-    lines.append(f"- Escanteios: {gs(home_stats, 'corner_kicks')} x {gs(away_stats, 'corner_kicks')}")
-    lines.append(f"- Cartões Amarelos: {gs(home_stats, 'yellow_cards')} x {gs(away_stats, 'yellow_cards')}")
-    lines.append(f"- Posse de Bola: {gs(home_stats, 'ball_possession')}% x {gs(away_stats, 'ball_possession')}%")
+    rows = (
+        ("Remates", hc['shots_total'], ac['shots_total']),
+        ("Remates no Gol", hc['shots_on'], ac['shots_on']),
+        ("Escanteios", hc['corners'], ac['corners']),
+        ("Cartões Amarelos", hc['yellows'], ac['yellows']),
+        ("Posse de Bola", f"{hc['possession']}%", f"{ac['possession']}%"),
+    )
+    lines.append("\n".join(f"- {label}: {h} x {a}" for label, h, a in rows))
 
     lines.append("--------------------------------------------")
     lines.append("🎯 *Dicas de Aposta (Top 3)*")
@@ -1215,7 +1346,7 @@ def format_live_analysis(radar_data: Dict, tips: List[Dict]) -> str:
         lines.append(f"_{tips[0]['reason']}_" if tips else "_Aguardando oportunidade clara..._")
     else:
         for tip in tips:
-            line = f"- *{tip['market']}*: {tip['recommendation']} (conf: {format_conf_pct(tip['confidence'])}) — {tip['reason']}"
+            line = _TIP_TEMPLATE.format(market=tip['market'], recommendation=tip['recommendation'], conf=format_conf_pct(tip['confidence']), reason=tip['reason'])
             if tip.get("best_odd") and tip.get("best_book"):
                  line += f" — 💰 {tip['best_odd']:.2f} @ {tip['best_book']}"
             lines.append(line)
@@ -1248,21 +1379,20 @@ def format_radar_only(radar_data: Dict) -> str:
     lines.append("--------------------------------------------")
     lines.append("📊 *Estatísticas do Jogo*")
     
-    stats = radar_data.get("statistics", {})
-    home_stats, away_stats = stats.get("home", {}), stats.get("away", {})
-    def gs(s, *k):
-        for key in k:
-            if key in s: return s.get(key, 0)
-        return 0
-
-    lines.append(f"- Remates: {gs(home_stats, 'total_shots')} x {gs(away_stats, 'total_shots')}")
-    lines.append(f"- Remates no Gol: {gs(home_stats, 'shots_on_goal')} x {gs(away_stats, 'shots_on_goal')}")
-    lines.append(f"- Escanteios: {gs(home_stats, 'corner_kicks')} x {gs(away_stats, 'corner_kicks')}")
-    lines.append(f"- Cartões Amarelos: {gs(home_stats, 'yellow_cards')} x {gs(away_stats, 'yellow_cards')}")
-    lines.append(f"- Posse de Bola: {gs(home_stats, 'ball_possession', 'possession')}% x {gs(away_stats, 'ball_possession', 'possession')}%")
-    # NOVAS LINHAS ADICIONADAS
-    lines.append(f"- Faltas: {gs(home_stats, 'fouls')} x {gs(away_stats, 'fouls')}")
-    lines.append(f"- Impedimentos: {gs(home_stats, 'offsides')} x {gs(away_stats, 'offsides')}")
+    canon = _radar_canon(radar_data)
+    hc, ac = canon["home"], canon["away"]
+
+    rows = (
+        ("Remates", hc['shots_total'], ac['shots_total']),
+        ("Remates no Gol", hc['shots_on'], ac['shots_on']),
+        ("Escanteios", hc['corners'], ac['corners']),
+        ("Cartões Amarelos", hc['yellows'], ac['yellows']),
+        ("Posse de Bola", f"{hc['possession']}%", f"{ac['possession']}%"),
+        # NOVAS LINHAS ADICIONADAS
+        ("Faltas", hc['fouls'], ac['fouls']),
+        ("Impedimentos", hc['offsides'], ac['offsides']),
+    )
+    lines.append("\n".join(f"- {label}: {h} x {a}" for label, h, a in rows))
 
     lines.append("\n_Radar fornece apenas estatísticas, sem dicas de aposta._")
     return "\n".join(lines)
@@ -1271,33 +1401,212 @@ def format_radar_only(radar_data: Dict) -> str:
 # =========================
 # FLASK API
 # =========================
+# chaves não-str (ids int) viram string; datetimes sem tz são tratados como UTC
+_ORJSON_OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+
+class ORJSONProvider(DefaultJSONProvider):
+    """jsonify via orjson: bem mais rápido nos payloads grandes (fixtures/grouped/full)."""
+    # nunca indentar/ordenar, nem com FLASK_DEBUG (no Flask 3 substituem JSONIFY_PRETTYPRINT_REGULAR/JSON_SORT_KEYS)
+    compact = True
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=self.default, option=_ORJSON_OPTS).decode()
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+
+@app.errorhandler(Exception)
+def _handle_error(e):
+    """Erro não tratado em qualquer rota vira {"error": ...} (500, ou 503 se a API-Football falhou); HTTPException mantém o próprio status."""
+    if isinstance(e, HTTPException):
+        # mantém os headers da exceção (Allow no 405, Retry-After, WWW-Authenticate...), troca só o corpo
+        resp = e.get_response()
+        resp.set_data(orjson.dumps({"error": e.description}))
+        resp.mimetype = "application/json"
+        return resp
+    if isinstance(e, UpstreamError):
+        log.warning("%s %s: %s", request.method, request.path, e)
+        return jsonify({"error": str(e)}), 503
+    log.exception("erro em %s %s", request.method, request.path)
+    return jsonify({"error": str(e)}), 500
+
+@app.before_request
+def _init_g():
+    g._req_cache = {}
+
+# respostas JSON menores que isso não compensam o custo do gzip
+GZIP_MIN_BYTES = int(os.environ.get("GZIP_MIN_BYTES", "1024"))
+
+def _accepts_gzip() -> bool:
+    # accept_encodings respeita q-values: "gzip;q=0" é recusa explícita
+    return request.accept_encodings["gzip"] > 0
+
+@app.after_request
+def _gzip_response(resp):
+    """Comprime JSON grande (/full, /grouped) quando o cliente aceita gzip (rotas cached_json já saem comprimidas do cache)."""
+    if (not _accepts_gzip()
+            or resp.status_code != 200
+            or resp.direct_passthrough
+            or resp.is_streamed
+            or resp.mimetype != "application/json"
+            or "Content-Encoding" in resp.headers):
+        return resp
+    data = resp.get_data()
+    if len(data) < GZIP_MIN_BYTES:
+        return resp
+    resp.set_data(gzip.compress(data, compresslevel=5))
+    resp.headers["Content-Encoding"] = "gzip"
+    resp.vary.add("Accept-Encoding")
+    return resp
+
+def _json_response(data: Any, status: int = 200) -> Response:
+    """Resposta JSON direto em bytes do orjson (sem o round-trip str/bytes do jsonify)."""
+    return Response(orjson.dumps(data, default=app.json.default, option=_ORJSON_OPTS), status=status, mimetype="application/json")
+
+def _wants_stream() -> bool:
+    return request.args.get("stream") == "1"
+
+def _stream_response_list(items: Iterable[Any]) -> Response:
+    """{"response": [...]} enviado em chunks, um fixture por vez (memória constante, cliente começa a ler antes)."""
+    def gen():
+        yield b'{"response":['
+        prefix = b""
+        for item in items:
+            yield prefix + orjson.dumps(item, default=app.json.default, option=_ORJSON_OPTS)
+            prefix = b","
+        yield b"]}"
+    return Response(gen(), mimetype="application/json")
+
+# Cache de respostas prontas (bytes JSON) por path+query. Guarda a última resposta boa mesmo depois
+# do TTL para servir "stale" quando a API cair (exceção ou 5xx na rota).
+RESPONSE_STALE_MAX = int(os.environ.get("RESPONSE_STALE_MAX", "600"))
+_response_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+def _stale_rec(key: str) -> Optional[Dict[str, Any]]:
+    with _cache_lock:
+        rec = _response_cache.get(key)
+    if rec and time.time() - rec["ts"] <= RESPONSE_STALE_MAX:
+        return rec
+    return None
+
+def _body_etag(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+def cached_json(ttl: int, args: Tuple[str, ...] = (), stream: bool = False):
+    """
+    Decorator de rota GET: serve os bytes JSON do cache dentro do TTL; com fallback stale em exceção/5xx.
+    A chave é o path + só os query params que a rota lê (`args`, em ordem fixa): parâmetro extra
+    não cria entrada nova. Com stream=True, ?stream=1 vai direto para a rota (resposta em chunks, sem cache).
+    Vazio é resultado válido (acabaram os jogos ao vivo): a rota sinaliza falha do upstream com UpstreamError/503.
+    Toda resposta leva ETag fraco + Cache-Control max-age=ttl; If-None-Match igual devolve 304 sem corpo.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*view_args, **view_kwargs):
+            if stream and _wants_stream():
+                return view(*view_args, **view_kwargs)
+            key = request.path + "?" + "&".join(f"{a}={request.args.get(a, '')}" for a in args)
+            now = time.time()
+            with _cache_lock:
+                rec = _response_cache.get(key)
+                if rec is not None:
+                    _response_cache.move_to_end(key)
+            if rec is not None and now - rec["ts"] <= ttl:
+                return _bytes_response(rec, "HIT", max_age=int(ttl - (now - rec["ts"])))
+
+            try:
+                resp = app.make_response(view(*view_args, **view_kwargs))
+            except Exception as e:
+                if (stale := _stale_rec(key)) is not None:
+                    log.warning("servindo resposta STALE para %s: %r", key, e, exc_info=not isinstance(e, UpstreamError))
+                    return _bytes_response(stale, "STALE")
+                raise
+
+            if resp.status_code >= 500 or resp.is_streamed or resp.mimetype != "application/json":
+                if resp.status_code >= 500 and (stale := _stale_rec(key)) is not None:
+                    return _bytes_response(stale, "STALE")
+                return resp
+            if resp.status_code != 200:
+                return resp
+            body = resp.get_data()
+            rec = {"ts": now, "body": body, "etag": _body_etag(body), "gz": None}
+            with _cache_lock:
+                _response_cache[key] = rec
+                _response_cache.move_to_end(key)
+                while len(_response_cache) > CACHE_MAX_ENTRIES:
+                    _response_cache.popitem(last=False)
+            return _bytes_response(rec, "MISS", max_age=ttl)
+        return wrapper
+    return decorator
+
+def _conditional(resp: Response, cache_state: str, etag: str, max_age: int) -> Response:
+    """Aplica X-Cache/ETag/Cache-Control; se o cliente já tem esse ETag, troca por 304 vazio."""
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    resp.headers["X-Cache"] = cache_state
+    resp.set_etag(etag, weak=True)
+    resp.headers["Cache-Control"] = f"public, max-age={max(max_age, 0)}"
+    return resp
+
+def _bytes_response(rec: Dict[str, Any], cache_state: str, max_age: int = 0) -> Response:
+    """Resposta a partir de um registro do _response_cache; o gzip é feito uma vez e guardado no registro."""
+    body = rec["body"]
+    big = len(body) >= GZIP_MIN_BYTES
+    if big and _accepts_gzip():
+        if (gz := rec["gz"]) is None:
+            gz = rec["gz"] = gzip.compress(body, compresslevel=5)  # corrida aqui só repete o trabalho
+        resp = Response(gz, mimetype="application/json")
+        resp.headers["Content-Encoding"] = "gzip"
+    else:
+        resp = Response(body, mimetype="application/json")
+    if big:
+        resp.vary.add("Accept-Encoding")
+    return _conditional(resp, cache_state, rec["etag"], max_age)
+
+def cached_fixtures(days_forward: int = 0) -> List[Game]:
+    """get_fixtures_for_dates memoizado também por request (além do cache TTL)."""
+    req_cache = getattr(g, "_req_cache", None)
+    if req_cache is None:
+        return get_fixtures_for_dates(days_forward=days_forward)
+    key = ("fixtures", days_forward)
+    if key not in req_cache:
+        req_cache[key] = get_fixtures_for_dates(days_forward=days_forward)
+    return req_cache[key]
+
+_MENU_TEXT = (
+    "📊 *Betting IA*\n\n"
+    "1️⃣ Ver jogos disponíveis (Pré)\n"
+    "2️⃣ Analisar Jogos Pré\n"
+    "3️⃣ Analisar Jogos ao Vivo\n"
+    "4️⃣ Radar Futebol (Estatísticas ao vivo)\n"
+    "5️⃣ Estatísticas de jogador (Opta)\n\n"
+    "Digite o número correspondente ao jogo que deseja a análise.\n"
+    "Digite 0️⃣ para voltar ao menu principal a qualquer momento."
+)
 
 def format_menu_text():
-    return (
-        "📊 *Betting IA*\n\n"
-        "1️⃣ Ver jogos disponíveis (Pré)\n"
-        "2️⃣ Analisar Jogos Pré\n"
-        "3️⃣ Analisar Jogos ao Vivo\n"
-        "4️⃣ Radar Futebol (Estatísticas ao vivo)\n"
-        "5️⃣ Estatísticas de jogador (Opta)\n\n"
-        "Digite o número correspondente ao jogo que deseja a análise.\n"
-        "Digite 0️⃣ para voltar ao menu principal a qualquer momento."
-    )
+    return _MENU_TEXT
+
+# payload do GET / é constante: serializado uma vez no import
+_HOME_PAYLOAD = orjson.dumps({"status": "ok", "message": "Betting IA Tipster ativo 🚀", "menu": _MENU_TEXT})
 
 @app.route("/", methods=["GET"])
 def home():
-    return jsonify({"status": "ok", "message": "Betting IA Tipster ativo 🚀", "menu": format_menu_text()})
+    return Response(_HOME_PAYLOAD, mimetype="application/json")
 
 # fixtures (API-FOOTBALL style) — original
 @app.route("/fixtures", methods=["GET"])
 def fixtures_endpoint():
     date_param = request.args.get("date")
     if date_param:
-        raw = api_get_raw("fixtures", params={"date": date_param})
+        raw = cached_api("fixtures", params={"date": date_param})
     else:
         today = datetime.utcnow().date().strftime("%Y-%m-%d")
-        raw = api_get_raw("fixtures", params={"date": today})
+        raw = cached_api("fixtures", params={"date": today})
     if not raw:
         return jsonify({"response": []}), 200
     return jsonify(raw), 200
@@ -1305,7 +1614,7 @@ def fixtures_endpoint():
 # fixtures live (original)
 @app.route("/fixtures/live", methods=["GET"])
 def fixtures_live_raw():
-    raw = api_get_raw("fixtures", params={"live": "all"})
+    raw = cached_api("fixtures", params={"live": "all"})
     if not raw:
         return jsonify({"response": []}), 200
     return jsonify(raw), 200
@@ -1313,25 +1622,38 @@ def fixtures_live_raw():
 # -----------------
 # Helpers para agrupar por País -> Liga -> Jogos
 # -----------------
-def _make_game_obj_from_fixture(f: dict) -> dict:
-    fd = f.get("fixture", {}) or {}
-    fid = fd.get("id")
-    league = f.get("league", {}) or {}
-    teams = f.get("teams", {}) or {}
-    label = f"{teams.get('home',{}).get('name')} vs {teams.get('away',{}).get('name')}"
+@dataclass(slots=True)
+class GameObj:
+    """Jogo exposto nos endpoints de listagem/agrupamento (orjson serializa dataclass direto)."""
+    game_id: Optional[int]
+    label: str
+    utc_date: Optional[str]
+    league: Dict[str, Any]
+    raw: dict
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"game_id": self.game_id, "label": self.label, "utc_date": self.utc_date, "league": self.league, "raw": self.raw}
+
+@lru_cache(maxsize=1024)
+def _league_summary(league_id: Any, country: Optional[str], name: Optional[str]) -> Dict[str, Any]:
+    """Dict {id, country, name} compartilhado entre todos os jogos da mesma liga (somente leitura)."""
+    return {"id": league_id, "country": country, "name": name}
+
+def _make_game_obj_from_fixture(f: dict) -> GameObj:
+    fd = f.get("fixture") or _EMPTY
+    league = f.get("league") or _EMPTY
+    teams = f.get("teams") or _EMPTY
+    home_name = (teams.get("home") or _EMPTY).get("name")
+    away_name = (teams.get("away") or _EMPTY).get("name")
     # We keep game_id (server-side), but when presenting to the client
     # you can use 'label' only (hide id) — client may still need id for analysis endpoints.
-    return {
-        "game_id": fid,
-        "label": label,
-        "utc_date": fd.get("date"),
-        "league": {
-            "id": league.get("id"),
-            "country": league.get("country"),
-            "name": league.get("name")
-        },
-        "raw": f
-    }
+    return GameObj(
+        game_id=fd.get("id"),
+        label=f"{home_name} vs {away_name}",
+        utc_date=fd.get("date"),
+        league=_league_summary(league.get("id"), league.get("country"), league.get("name")),
+        raw=f,
+    )
 
 def group_fixtures_by_country_league(fixtures: List[dict]) -> List[Dict[str, Any]]:
     """
@@ -1349,301 +1671,319 @@ def group_fixtures_by_country_league(fixtures: List[dict]) -> List[Dict[str, Any
         }, ...
     ]
     """
-    buckets: Dict[str, Dict[str, Any]] = OrderedDict()
+    # índice plano (país, league_id) -> lista de games: um único lookup por fixture no caminho comum;
+    # país/liga só são materializados na saída na primeira vez em que aparecem
+    buckets: Dict[str, Dict[str, Any]] = {}
+    slots: Dict[Tuple[str, Any], List[GameObj]] = {}
     for f in fixtures:
-        league = f.get("league", {}) or {}
-        country = league.get("country") or "Unknown"
-        league_name = league.get("name") or "Unknown League"
-        league_id = league.get("id")
-        if country not in buckets:
-            buckets[country] = {"country": country, "leagues": OrderedDict()}
-        leagues_map = buckets[country]["leagues"]
-        if league_id not in leagues_map:
-            leagues_map[league_id] = {"league_id": league_id, "league_name": league_name, "games": []}
-        leagues_map[league_id]["games"].append(_make_game_obj_from_fixture(f))
-    # convert OrderedDicts to lists
-    out = []
-    for country, cdata in buckets.items():
-        leagues_list = []
-        for lid, ldata in cdata["leagues"].items():
-            leagues_list.append(ldata)
-        out.append({"country": country, "leagues": leagues_list})
-    return out
+        league = f.get("league") or _EMPTY
+        # strings do JSON chegam como objetos novos a cada fixture: internar deixa o hash/igualdade por ponteiro
+        country = sys.intern(league.get("country") or "Unknown")
+        key = (country, league.get("id"))
+        games = slots.get(key)
+        if games is None:
+            bucket = buckets.get(country)
+            if bucket is None:
+                bucket = buckets[country] = {"country": country, "leagues": []}
+            games = slots[key] = []
+            bucket["leagues"].append({"league_id": key[1], "league_name": sys.intern(league.get("name") or "Unknown League"), "games": games})
+        games.append(_make_game_obj_from_fixture(f))
+    # dicts preservam a ordem de inserção: países/ligas saem na ordem em que aparecem
+    return list(buckets.values())
+
+# JSON agrupado já serializado, um slot por rota, amarrado à identidade do snapshot de origem
+# (lista de fixtures / resposta do cached_api): enquanto o cache devolver o mesmo objeto, o
+# agrupamento e a serialização não se repetem. A referência guardada mantém o objeto vivo,
+# então `is` não confunde com um objeto novo no mesmo endereço.
+_grouped_cache: Dict[str, Tuple[Any, bytes]] = {}
+
+def _grouped_json_response(slot: str, source: Any, raws: List[dict]) -> Response:
+    with _cache_lock:
+        entry = _grouped_cache.get(slot)
+    if entry is not None and entry[0] is source:
+        body = entry[1]
+    else:
+        body = orjson.dumps(group_fixtures_by_country_league(raws), default=app.json.default, option=_ORJSON_OPTS)
+        with _cache_lock:
+            _grouped_cache[slot] = (source, body)
+    return Response(body, mimetype="application/json")
 
 # -----------------
 # Compat endpoints tailored for index.js / bot
 # -----------------
 @app.route("/pre-live-games", methods=["GET"])
+@cached_json(ttl=60)
 def pre_live_games_compat():
     """
     Retorna lista de jogos pré-live (hoje) com campo 'league' (country + name).
     Ideal para o index.js agrupar por país/ligas.
     """
-    fixtures = get_fixtures_for_dates(days_forward=0)
+    fixtures = cached_fixtures(0)
     out = []
     for f in fixtures:
         # only include scheduled (not live) when listing pre-live
-        if f.get("type") == "scheduled":
-            raw = f.get("raw") or {}
-            out.append(_make_game_obj_from_fixture(raw))
-    return jsonify(out), 200
+        if f.type == "scheduled":
+            out.append(_make_game_obj_from_fixture(f.raw))
+    return _json_response(out)
 
 @app.route("/pre-live-games/full", methods=["GET"])
+@cached_json(ttl=60, stream=True)
 def pre_live_games_full():
     # mesma coisa mas devolve raw API-Football response style
-    fixtures = get_fixtures_for_dates(days_forward=0)
+    fixtures = cached_fixtures(0)
+    if _wants_stream():
+        return _stream_response_list(f.raw for f in fixtures if f.type == "scheduled")
     out = []
     for f in fixtures:
-        if f.get("type") == "scheduled":
-            out.append(f.get("raw"))
-    return jsonify({"response": out}), 200
+        if f.type == "scheduled":
+            out.append(f.raw)
+    return _json_response({"response": out})
 
 @app.route("/pre-live-grouped", methods=["GET"])
+@cached_json(ttl=60)
 def pre_live_grouped():
     """
     Retorna fixtures pré-live agrupados por country -> leagues -> games
     (útil para exibir no bot por país/league sem expor IDs diretamente).
     """
-    fixtures = get_fixtures_for_dates(days_forward=0)
-    raws = [f.get("raw") for f in fixtures if f.get("type") == "scheduled"]
+    fixtures = cached_fixtures(0)
+    raws = [f.raw for f in fixtures if f.type == "scheduled"]
     if not raws:
         return jsonify([]), 200
-    grouped = group_fixtures_by_country_league(raws)
-    return jsonify(grouped), 200
+    return _grouped_json_response("pre-live", fixtures, raws)
+
+def _live_fixtures() -> Dict[str, Any]:
+    raw = cached_api("fixtures", params={"live": "all"})
+    if raw is None:
+        raise UpstreamError("fixtures?live=all sem resposta da API")
+    return raw
 
 @app.route("/live-games", methods=["GET"])
+@cached_json(ttl=LIVE_CACHE_TTL)
 def live_games_compat():
     """
     Lista de jogos ao vivo simplificada (game_id, label, league).
     """
-    raw = api_get_raw("fixtures", params={"live": "all"})
+    raw = _live_fixtures()
     out = []
-    if raw and raw.get("response"):
+    if raw.get("response"):
         for f in raw["response"]:
             out.append(_make_game_obj_from_fixture(f))
-    return jsonify(out), 200
+    return _json_response(out)
 
 @app.route("/live-games/full", methods=["GET"])
 def live_games_full():
-    raw = api_get_raw("fixtures", params={"live": "all"})
-    return jsonify(raw or {"response": []}), 200
+    raw = _live_fixtures()
+    if _wants_stream():
+        return _stream_response_list(raw.get("response") or [])
+    return _json_response(raw)
 
 @app.route("/live-games-grouped", methods=["GET"])
+@cached_json(ttl=LIVE_CACHE_TTL)
 def live_games_grouped():
-    raw = api_get_raw("fixtures", params={"live": "all"})
-    if not raw or not raw.get("response"):
+    raw = _live_fixtures()
+    if not raw.get("response"):
         return jsonify([]), 200
-    grouped = group_fixtures_by_country_league(raw["response"])
-    return jsonify(grouped), 200
+    return _grouped_json_response("live", raw, raw["response"])
 
 # -----------------
 # analyze endpoints (compat both styles)
 # -----------------
+# Pool compartilhado entre requests para o fan-out de I/O das rotas (evita criar threads por request).
+# Só recebe tarefas submetidas pela thread do request: tarefas do pool não devem esperar outras do pool.
+IO_POOL_WORKERS = int(os.environ.get("IO_POOL_WORKERS", "8"))
+_IO_POOL = ThreadPoolExecutor(max_workers=IO_POOL_WORKERS, thread_name_prefix="tipster-io")
+
+def _submit_team_players(fixture: dict) -> Tuple[Optional[Future], Optional[Future]]:
+    """Dispara no _IO_POOL o /players de casa e visitante (um por equipe: elenco + statistics)."""
+    teams = fixture.get("teams", {})
+    home_id = teams.get("home", {}).get("id")
+    away_id = teams.get("away", {}).get("id")
+    # só os jogadores usados em _featured_players_analysis: 2 da casa e 1 do visitante
+    home_fut = _IO_POOL.submit(analyze_team_players, home_id, limit=2) if home_id else None
+    away_fut = _IO_POOL.submit(analyze_team_players, away_id, limit=1) if away_id else None
+    return home_fut, away_fut
+
+def _featured_players_analysis(futs: Tuple[Optional[Future], Optional[Future]]) -> List[dict]:
+    """
+    Analisa até 2 jogadores em destaque: os dois primeiros da casa e, se faltar, o primeiro do visitante.
+    Recebe os futures de _submit_team_players (as duas equipes já buscadas em paralelo).
+    """
+    home_fut, away_fut = futs
+
+    # try to analyze a couple of most likely scorers (first two players)
+    home_analyses = (home_fut.result(timeout=25) if home_fut else None) or []
+    players_analysis = [a for a in home_analyses[:2] if a["player_info"].get("id")]
+
+    # o visitante já foi buscado em paralelo; se não precisar dele, a resposta não espera a chamada terminar
+    if away_fut and len(players_analysis) < 2:
+        away_analyses = away_fut.result(timeout=25) or []
+        if away_analyses and away_analyses[0]["player_info"].get("id"):
+            players_analysis.append(away_analyses[0])
+    return players_analysis
+
 @app.route("/analyze/game", methods=["POST"])
 @app.route("/analyze-game", methods=["POST"])
 def api_analyze_game():
+    data = request.get_json() or {}
+    game_id = data.get("game_id")
+    if not game_id:
+        return jsonify({"error": "game_id é obrigatório"}), 400
+    # fixture já indexado: os elencos começam a ser buscados enquanto analyze() roda (pipeline)
+    futs = None
+    if (fixture := _indexed_fixture(int(game_id))) is not None:
+        futs = _submit_team_players(fixture)
+    game_analysis = analyze(int(game_id))
+    players_analysis = []
     try:
-        data = request.get_json() or {}
-        game_id = data.get("game_id")
-        if not game_id:
-            return jsonify({"error": "game_id é obrigatório"}), 400
-        game_analysis = analyze(int(game_id))
-        players_analysis = []
-        try:
-            if game_analysis and game_analysis.get("raw_fixture"):
-                fixture = game_analysis["raw_fixture"]
-                home_id = fixture.get("teams", {}).get("home", {}).get("id")
-                away_id = fixture.get("teams", {}).get("away", {}).get("id")
-                if home_id:
-                    players = get_players_for_team(home_id) or []
-                    if players:
-                        # try to analyze a couple of most likely scorers (first two players)
-                        pid = players[0].get("id")
-                        if pid:
-                            p_analysis = analyze_player(pid)
-                            if p_analysis:
-                                players_analysis.append(p_analysis)
-                        if len(players) > 1:
-                            pid2 = players[1].get("id")
-                            if pid2:
-                                p2_analysis = analyze_player(pid2)
-                                if p2_analysis:
-                                    players_analysis.append(p2_analysis)
-                if away_id and len(players_analysis) < 2:
-                    players = get_players_for_team(away_id) or []
-                    if players:
-                        pid = players[0].get("id")
-                        if pid:
-                            p_analysis = analyze_player(pid)
-                            if p_analysis:
-                                players_analysis.append(p_analysis)
-        except Exception:
-            traceback.print_exc()
-        text = format_full_pre_game_analysis(game_analysis or {}, players_analysis)
-        return jsonify({"analysis_text": text, "raw": {"game_analysis": game_analysis, "players": players_analysis}}), 200
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        if game_analysis and game_analysis.get("raw_fixture"):
+            players_analysis = _featured_players_analysis(futs or _submit_team_players(game_analysis["raw_fixture"]))
+    except Exception:
+        log.exception("jogadores em destaque do jogo %s", game_id)
+    text = format_full_pre_game_analysis(game_analysis or {}, players_analysis)
+    return jsonify({"analysis_text": text, "raw": {"game_analysis": game_analysis, "players": players_analysis}}), 200
 
 @app.route("/analyze/live", methods=["POST"])
 @app.route("/analyze-live-game", methods=["POST"])
 def api_analyze_live():
-    try:
-        data = request.get_json() or {}
-        game_id = data.get("game_id")
-        if not game_id:
-            return jsonify({"error": "game_id é obrigatório"}), 400
-        radar_data = stats_aovivo(int(game_id))
-        if not radar_data:
-             return jsonify({"analysis_text": "❌ Não foi possível obter dados ao vivo do jogo."})
-        
-        live_tips = analyze_live_from_stats(radar_data)
-        # Adiciona a busca de odds para as dicas ao vivo
-        enhanced_tips = enhance_predictions_with_odds(live_tips, int(game_id))
-        
-        text = format_live_analysis(radar_data, enhanced_tips)
-        return jsonify({"analysis_text": text, "raw": {"radar": radar_data, "tips": enhanced_tips}}), 200
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    data = request.get_json() or {}
+    game_id = data.get("game_id")
+    if not game_id:
+        return jsonify({"error": "game_id é obrigatório"}), 400
+    radar_data = stats_aovivo(int(game_id))
+    if not radar_data:
+         return jsonify({"analysis_text": "❌ Não foi possível obter dados ao vivo do jogo."})
+    
+    live_tips = analyze_live_from_stats(radar_data)
+    # Adiciona a busca de odds para as dicas ao vivo
+    enhanced_tips = enhance_predictions_with_odds(live_tips, int(game_id))
+    
+    text = format_live_analysis(radar_data, enhanced_tips)
+    return jsonify({"analysis_text": text, "raw": {"radar": radar_data, "tips": enhanced_tips}}), 200
 
 # radar-only endpoint (for explicit radar menu)
 @app.route("/analyze/radar", methods=["POST"])
 def api_analyze_radar():
-    try:
-        data = request.get_json() or {}
-        game_id = data.get("game_id")
-        if not game_id:
-            return jsonify({"error": "game_id é obrigatório"}), 400
+    data = request.get_json() or {}
+    game_id = data.get("game_id")
+    if not game_id:
+        return jsonify({"error": "game_id é obrigatório"}), 400
 
-        radar_data = stats_aovivo(int(game_id))
-        if not radar_data:
-            return jsonify({"analysis_text": "❌ Não foi possível obter dados do radar."}), 200
+    radar_data = stats_aovivo(int(game_id))
+    if not radar_data:
+        return jsonify({"analysis_text": "❌ Não foi possível obter dados do radar."}), 200
 
-        # CORRIGIDO: Agora chama a função correta que não gera dicas
-        text = format_radar_only(radar_data)
+    # CORRIGIDO: Agora chama a função correta que não gera dicas
+    text = format_radar_only(radar_data)
 
-        return jsonify({ "analysis_text": text, "raw": radar_data }), 200
-
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return jsonify({ "analysis_text": text, "raw": radar_data }), 200
 
 # Opta endpoints
 @app.route("/players", methods=["GET"])
 def api_players_old():
-    try:
-        player_id = request.args.get("id") or request.args.get("player_id")
-        season = request.args.get("season") or datetime.now().year
-        if not player_id:
-            return jsonify({"error": "id do jogador é obrigatório (parâmetro id)"}), 400
-        analysis = analyze_player(int(player_id), int(season))
-        if analysis is None:
-            return jsonify({"error": "Nenhum dado encontrado"}), 404
-        analysis_text = format_player_analysis(analysis)
-        return jsonify(
-            {"opta": {**analysis, "analysis_text": analysis_text}}
-        ), 200
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    player_id = request.args.get("id") or request.args.get("player_id")
+    season = request.args.get("season") or current_season()
+    if not player_id:
+        return jsonify({"error": "id do jogador é obrigatório (parâmetro id)"}), 400
+    analysis = analyze_player(int(player_id), int(season))
+    if analysis is None:
+        return jsonify({"error": "Nenhum dado encontrado"}), 404
+    analysis_text = format_player_analysis(analysis)
+    return jsonify(
+        {"opta": {**analysis, "analysis_text": analysis_text}}
+    ), 200
 
 
 @app.route("/opta-player", methods=["POST"])
 def api_opta_player_post():
-    try:
-        data = request.get_json() or {}
-        player_id = data.get("player_id")
-        season = data.get("season") or datetime.now().year
-        if not player_id:
-            return jsonify({"error": "player_id é obrigatório"}), 400
-        analysis = analyze_player(int(player_id), int(season))
-        if analysis is None:
-            return jsonify({"error": "Nenhum dado encontrado"}), 404
-        analysis_text = format_player_analysis(analysis)
-        return jsonify(
-            {"opta": {**analysis, "analysis_text": analysis_text}}
-        ), 200
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    data = request.get_json() or {}
+    player_id = data.get("player_id")
+    season = data.get("season") or current_season()
+    if not player_id:
+        return jsonify({"error": "player_id é obrigatório"}), 400
+    analysis = analyze_player(int(player_id), int(season))
+    if analysis is None:
+        return jsonify({"error": "Nenhum dado encontrado"}), 404
+    analysis_text = format_player_analysis(analysis)
+    return jsonify(
+        {"opta": {**analysis, "analysis_text": analysis_text}}
+    ), 200
 
 # -----------------
 # Novos endpoints utilitários para o menu Opta / front-end
 # -----------------
+def _build_opta_indexes(days_forward: int) -> Tuple[Dict[Any, dict], Dict[str, Dict[Any, dict]]]:
+    """
+    Índices da janela de fixtures usados pelo menu Opta, montados numa passada só e
+    cacheados com o mesmo TTL dos fixtures:
+      leagues:          {league_id: {id, name, country}}
+      teams_by_league:  {str(league_id): {team_id: {id, name}}}  (chave str: casa direto com o query param)
+    """
+    ck = f"opta:indexes:{days_forward}:{datetime.utcnow().date()}"
+    cached = _cache_get(ck)
+    if cached is not None:
+        return cached
+    fixtures = cached_fixtures(days_forward)
+    leagues: Dict[Any, dict] = {}
+    teams_by_league: Dict[str, Dict[Any, dict]] = {}
+    for f in fixtures:
+        league = f.league
+        lid = league.get("id")
+        if lid:
+            leagues[lid] = {"id": lid, "name": league.get("name"), "country": league.get("country")}
+        teams_map = teams_by_league.setdefault(str(lid), {})
+        teams = f.teams
+        for side in ("home", "away"):
+            if (team := teams.get(side)) and (tid := team.get("id")):
+                teams_map[tid] = {"id": tid, "name": team.get("name")}
+    out = (leagues, teams_by_league)
+    # falha da API já saiu como UpstreamError em cached_fixtures: janela vazia aqui é real
+    _cache_set(ck, out, ttl=FIXTURES_CACHE_TTL)
+    return out
+
 @app.route("/opta/countries", methods=["GET"])
 def opta_countries():
     """
     NOVO: Retorna uma lista de países únicos que têm jogos nos próximos dias.
     """
-    try:
-        fixtures = get_fixtures_for_dates(days_forward=2)
-        # Usamos um set para garantir que cada país apareça apenas uma vez
-        countries = sorted(list(set(
-            f.get("raw", {}).get("league", {}).get("country")
-            for f in fixtures if f.get("raw", {}).get("league", {}).get("country")
-        )))
-        return jsonify(countries), 200
-    except Exception as e:
-        traceback.print_exc()
-        return jsonify([]), 200
+    fixtures = cached_fixtures(2)
+    # Usamos um set para garantir que cada país apareça apenas uma vez
+    countries = sorted({country for f in fixtures if (country := f.league.get("country"))})
+    return jsonify(countries), 200
 
 @app.route("/opta/leagues", methods=["GET"])
+@cached_json(ttl=OPTA_CACHE_TTL, args=("country",))
 def opta_leagues():
     """
     Retorna ligas. Se um país for fornecido (ex: /opta/leagues?country=Brazil),
     filtra as ligas para apenas aquele país.
     """
-    try:
-        country_filter = request.args.get("country")
-        # Removido o erro que exigia o país, agora ele é opcional.
-        # Se não vier, lista todas as ligas.
-
-        fixtures = get_fixtures_for_dates(days_forward=2)
-        leagues_map = {}
-        
-        for f in fixtures:
-            raw = f.get("raw") or {}
-            league = raw.get("league", {}) or {}
-            country = league.get("country")
-            
-            # Se um filtro de país foi passado e não bate, pula pra próxima
-            if country_filter and country and country.lower() != country_filter.lower():
-                continue
-
-            if lid := league.get("id"):
-                leagues_map[lid] = {"id": lid, "name": league.get("name"), "country": country}
-                
-        out = list(leagues_map.values())
-        return jsonify(out), 200
-    except Exception as e:
-        traceback.print_exc()
-        return jsonify([]), 200
+    country_filter = request.args.get("country")
+    # Removido o erro que exigia o país, agora ele é opcional.
+    # Se não vier, lista todas as ligas.
+
+    leagues, _ = _build_opta_indexes(2)
+    if country_filter:
+        cf = country_filter.lower()
+        # ligas sem país continuam aparecendo em qualquer filtro (como antes)
+        out = [lg for lg in leagues.values() if not lg["country"] or lg["country"].lower() == cf]
+    else:
+        out = list(leagues.values())
+    return jsonify(out), 200
 
 @app.route("/opta/teams", methods=["GET"])
+@cached_json(ttl=OPTA_CACHE_TTL, args=("league_id",))
 def opta_teams():
     """
     /opta/teams?league_id=123
     Retorna times para a liga informada (baseado nos fixtures próximos dias).
     """
-    try:
-        league_id = request.args.get("league_id")
-        if not league_id:
-            return jsonify({"error": "league_id obrigatório"}), 400
-        fixtures = get_fixtures_for_dates(days_forward=2)
-        teams_map = {}
-        for f in fixtures:
-            raw = f.get("raw") or {}
-            league = raw.get("league", {}) or {}
-            if str(league.get("id")) != str(league_id):
-                continue
-            teams = raw.get("teams", {}) or {}
-            home = teams.get("home", {}) or {}
-            away = teams.get("away", {}) or {}
-            if home.get("id"):
-                teams_map[home.get("id")] = {"id": home.get("id"), "name": home.get("name")}
-            if away.get("id"):
-                teams_map[away.get("id")] = {"id": away.get("id"), "name": away.get("name")}
-        out = list(teams_map.values())
-        return jsonify(out), 200
-    except Exception as e:
-        traceback.print_exc()
-        return jsonify([]), 200
+    league_id = request.args.get("league_id")
+    if not league_id:
+        return jsonify({"error": "league_id obrigatório"}), 400
+    _, teams_by_league = _build_opta_indexes(2)
+    out = list(teams_by_league.get(league_id, _EMPTY).values())
+    return jsonify(out), 200
 
 @app.route("/opta/players", methods=["GET"])
 def opta_players():
@@ -1651,16 +1991,14 @@ def opta_players():
     /opta/players?team_id=123
     Retorna jogadores (id,name) para o time via API-FOOTBALL players endpoint.
     """
-    try:
-        team_id = request.args.get("team_id")
-        season = request.args.get("season") or datetime.now().year
-        if not team_id:
-            return jsonify({"error": "team_id obrigatório"}), 400
-        players = get_players_for_team(int(team_id), int(season)) or []
-        return jsonify(players), 200
-    except Exception as e:
-        traceback.print_exc()
-        return jsonify([]), 200
+    team_id = request.args.get("team_id")
+    season = request.args.get("season") or current_season()
+    if not team_id:
+        return jsonify({"error": "team_id obrigatório"}), 400
+    players = get_players_for_team(int(team_id), int(season))
+    if players is None:
+        raise UpstreamError(f"players?team={team_id} sem resposta da API")
+    return jsonify(players), 200
 
 # Rota legacy /pre-live-games também já implementada acima
 # -----------------
@@ -1668,7 +2006,10 @@ def opta_players():
 # =========================
 # RUN
 # =========================
+# Produção: gunicorn tipster:app (config em gunicorn.conf.py)
+# (o servidor embutido abaixo é só para desenvolvimento local)
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
-    print(f"Tipster API rodando na porta {port} (modo local)")
-    app.run(host="0.0.0.0", port=port, debug=True)
+    debug = os.environ.get("FLASK_DEBUG", "0").lower() in ("1", "true", "yes")
+    print(f"Tipster API rodando na porta {port} (modo local, debug={debug})")
+    app.run(host="0.0.0.0", port=port, debug=debug, threaded=True)